@@ -1,15 +1,23 @@
 "use client";
 
 import { usePython } from "react-py";
-import { useEffect, useState } from "react";
+import { useEffect, useMemo, useState } from "react";
 import { Loader2, Play, Terminal } from "lucide-react";
 
+// 백엔드가 코드에 삽입한 base64 CSV 데이터 (실행에는 필요하지만 화면에는 표시하지 않음)
+const CSV_PAYLOAD_PATTERN = /base64\.b64decode\("[A-Za-z0-9+/=]*"\)/g;
+
 export function PythonRunner({ code }: { code: string }) {
   // packages에 pandas 추가 (로드 시간이 조금 걸림)
   const { runPython, stdout, stderr, isLoading, isRunning } = usePython({
     packages: { official: ["pandas"] },
   });
   const [hasRun, setHasRun] = useState(false);
+  // 표시용 코드: 데이터 페이로드만 자리표시자로 대체 (실행은 원본 code 사용)
+  const displayCode = useMemo(
+    () => code.replace(CSV_PAYLOAD_PATTERN, 'base64.b64decode("<query result>")'),
+    [code],
+  );
 
   // 컴포넌트 마운트 시 자동 실행 (지연 실행으로 타이밍 이슈 완화)
   useEffect(() => {
@@ -39,7 +47,7 @@ export function PythonRunner({ code }: { code: string }) {
 
       {/* Code Viewer (Optional: can use syntax highlighter) */}
       <div className="overflow-x-auto bg-[#1e1e1e] p-4 font-mono text-xs text-gray-300 opacity-80">
-        <pre>{code}</pre>
+        <pre>{displayCode}</pre>
       </div>
 
       {/* Output Section */}
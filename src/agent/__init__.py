@@ -4,7 +4,7 @@ LangGraph SQL Agent
 This module contains the core agent workflow for natural language to SQL conversion.
 """
 
-from .graph import app, workflow
+from .graph import workflow, get_app
 from .state import SQLAgentState, is_error_result
 from .nodes import (
     read_question,
@@ -19,10 +19,18 @@ from .nodes import (
 )
 from . import prompts
 
+
+def __getattr__(name):
+    """Resolve `app` lazily so importing the package does not compile the graph."""
+    if name == 'app':
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 __all__ = [
     # Workflow
     'app',
     'workflow',
+    'get_app',
     # State
     'SQLAgentState',
     'is_error_result',
@@ -7,14 +7,22 @@ Separating configuration makes it easier to:
 - Adjust temperature settings per task
 - Manage environment-specific settings
 
-LLM Instances:
-- llm_intent: Temperature 0.0 (deterministic intent classification)
-- llm_sql: Temperature 0.1 (accurate SQL generation)
-- llm_vis: Temperature 0.0 (strict visualization decisions)
-- llm_response: Temperature 0.7 (natural language responses)
+LLM Instances (built lazily on first use, then cached):
+- get_llm_intent(): Temperature 0.0 (deterministic intent classification)
+- get_llm_sql(): Temperature 0.1 (accurate SQL generation)
+- get_llm_vis(): Temperature 0.0 (strict visualization decisions)
+- get_llm_response(): Temperature 0.7 (natural language responses)
+
+The module-level names llm_intent, llm_sql, llm_vis, llm_response and llm
+still resolve to the same cached instances for backward compatibility.
+All instances share one sync and one async HTTP connection pool.
 """
 
 import os
+import functools
+from typing import Tuple
+
+import httpx
 from dotenv import load_dotenv
 from langchain_openai import ChatOpenAI
 
@@ -26,38 +34,94 @@ LLM_MODEL = os.getenv('LLM_MODEL', 'llama-3.3-70b')
 CEREBRAS_API_KEY = os.getenv('CEREBRAS_API_KEY')
 CEREBRAS_BASE_URL = "https://api.cerebras.ai/v1"
 
-# Task-specific LLMs with optimized temperature settings (using Cerebras via OpenAI-compatible API)
-llm_intent = ChatOpenAI(
-    model=LLM_MODEL,
-    temperature=0.0,
-    api_key=CEREBRAS_API_KEY,
-    base_url=CEREBRAS_BASE_URL
-)  # Intent classification: deterministic
-
-llm_sql = ChatOpenAI(
-    model=LLM_MODEL,
-    temperature=0.1,
-    api_key=CEREBRAS_API_KEY,
-    base_url=CEREBRAS_BASE_URL
-)  # SQL generation: accurate & safe
-
-llm_vis = ChatOpenAI(
-    model=LLM_MODEL,
-    temperature=0.0,
-    api_key=CEREBRAS_API_KEY,
-    base_url=CEREBRAS_BASE_URL
-)  # Visualization: deterministic (strict keyword detection)
-
-llm_response = ChatOpenAI(
-    model=LLM_MODEL,
-    temperature=0.7,
-    api_key=CEREBRAS_API_KEY,
-    base_url=CEREBRAS_BASE_URL
-)  # Response: natural & varied
-
-# Default LLM (for backward compatibility)
-llm = llm_sql
+# Shared HTTP connection pools: every LLM instance talks to the same host, so
+# they reuse one set of keep-alive TCP/TLS connections instead of one pool each
+HTTP_LIMITS = httpx.Limits(max_keepalive_connections=16, max_connections=64)
+
+
+@functools.cache
+def _get_http_clients() -> Tuple[httpx.Client, httpx.AsyncClient]:
+    """Create the shared sync/async HTTP clients on first use."""
+    return httpx.Client(limits=HTTP_LIMITS), httpx.AsyncClient(limits=HTTP_LIMITS)
+
+
+@functools.cache
+def _get_base_llm() -> ChatOpenAI:
+    """Build the one Cerebras chat model (OpenAI-compatible API) on the shared pools."""
+    http_client, http_async_client = _get_http_clients()
+    return ChatOpenAI(
+        model=LLM_MODEL,
+        temperature=0.0,
+        api_key=CEREBRAS_API_KEY,
+        base_url=CEREBRAS_BASE_URL,
+        http_client=http_client,
+        http_async_client=http_async_client
+    )
+
+
+def _create_llm(temperature: float) -> ChatOpenAI:
+    """
+    Derive a temperature variant of the base model.
+
+    model_copy is shallow and skips validation, so every variant keeps the
+    base model's OpenAI SDK clients instead of constructing its own set.
+    """
+    return _get_base_llm().model_copy(update={'temperature': temperature})
+
+
+# Task-specific LLMs with optimized temperature settings. Construction is
+# deferred so importing the agent (tests, CLI help, graph rendering) does not
+# pay SDK/TLS setup for models that are never called.
+@functools.cache
+def get_llm_intent() -> ChatOpenAI:
+    """Intent classification: deterministic"""
+    return _create_llm(0.0)
+
+
+@functools.cache
+def get_llm_sql() -> ChatOpenAI:
+    """SQL generation: accurate & safe"""
+    return _create_llm(0.1)
+
+
+@functools.cache
+def get_llm_vis() -> ChatOpenAI:
+    """Visualization: deterministic (strict keyword detection)"""
+    return _create_llm(0.0)
+
+
+@functools.cache
+def get_llm_response() -> ChatOpenAI:
+    """Response: natural & varied"""
+    return _create_llm(0.7)
+
+
+# Legacy module attributes, resolved lazily via __getattr__ (PEP 562).
+# `llm` is the default LLM kept for backward compatibility.
+_LAZY_LLMS = {
+    'llm_intent': get_llm_intent,
+    'llm_sql': get_llm_sql,
+    'llm_vis': get_llm_vis,
+    'llm_response': get_llm_response,
+    'llm': get_llm_sql,
+}
+
+
+def __getattr__(name: str):
+    if name in _LAZY_LLMS:
+        return _LAZY_LLMS[name]()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 
 # Workflow configuration constants
 MAX_SQL_RETRIES = 3  # Maximum SQL generation/execution retry attempts
-VALID_CHART_TYPES = {'bar', 'line', 'pie', 'scatter', 'area'}
+SQL_CACHE_SIZE = 4096  # Generated SQL kept per (question, schema) for repeat questions
+INTENT_CACHE_SIZE = 4096  # Intent classifications kept per normalized question
+VIS_CACHE_SIZE = 4096  # Chart decisions kept per (normalized question, result columns)
+PYODIDE_CODE_CACHE_SIZE = 256  # Generated analysis code kept per (normalized question, result columns)
+CHART_CACHE_SIZE = 256  # Rendered Plotly JSON kept per (question, chart decision, result)
+CACHE_TTL_SECONDS = int(os.getenv('CACHE_TTL_SECONDS', '3600'))  # Expiry for cached classifications
+SQL_FETCH_BATCH_SIZE = 1000  # Rows pulled per server-side cursor round-trip
+SQL_MAX_ROWS = int(os.getenv('SQL_MAX_ROWS', '10000'))  # Rows kept per query; the rest are not fetched
+PII_LOG_EVERY = max(1, int(os.getenv('PII_LOG_EVERY', '100')))  # Log 1 in N PII masking calls
+VALID_CHART_TYPES = frozenset({'bar', 'line', 'pie', 'scatter', 'area'})
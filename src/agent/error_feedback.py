@@ -16,8 +16,8 @@ The error feedback system provides specific guidance based on:
 """
 
 import re
-import ast
-from typing import Set
+import functools
+from typing import Callable, Dict, FrozenSet, Optional, Set
 from src.agent.feedbacks import (
     get_unknown_tables_feedback,
     get_multiple_statements_feedback,
@@ -33,6 +33,81 @@ from src.core.logger import setup_logger
 
 logger = setup_logger('cadet.error_feedback')
 
+# Patterns are compiled once at import; the router runs on every retry
+_UNKNOWN_TABLES_RE = re.compile(r"Unknown tables in query: (\{.*?\})")
+_COLUMN_MISSING_RE = re.compile(r'column "(.+?)" does not exist')
+# Quoted names inside the "{'foo', 'bar'}" set repr from the validator
+_TABLE_TOKEN_RE = re.compile(r"'([^']+)'")
+
+# Trigger phrases (lower-case) in priority order. All of them are matched in a
+# single pass over the lowered error message by one compiled alternation.
+_ERROR_MARKERS = (
+    ('unknown tables in query', 'unknown_tables'),
+    ('multiple sql statements not allowed', 'multiple_statements'),
+    ('sql comments not allowed', 'sql_comments'),
+    ('forbidden sql keyword: create', 'forbidden_create'),
+    ('does not exist', 'column_not_found'),
+    ('division by zero', 'division_by_zero'),
+    ('datetime', 'datetime_format'),
+)
+_ERROR_MARKER_RE = re.compile(
+    '|'.join(f'(?P<{tag}>{re.escape(marker)})' for marker, tag in _ERROR_MARKERS)
+)
+_CASE_PRIORITY = {tag: priority for priority, (_, tag) in enumerate(_ERROR_MARKERS)}
+
+
+def _unknown_tables_case(error_message: str, msg_low: str, allowed_tables: Set[str]) -> Optional[str]:
+    """Case 1: Unknown tables in query (with subquery alias detection)."""
+    match = _UNKNOWN_TABLES_RE.search(error_message)
+    if not match:
+        return None
+
+    invalid_tables_str = match.group(1)
+    invalid_tables_set = set(_TABLE_TOKEN_RE.findall(invalid_tables_str))
+    if not invalid_tables_set:
+        logger.warning(f"Failed to parse invalid tables: {invalid_tables_str}")
+        return get_parsing_error_feedback(error_message)
+
+    # Check if it's likely a subquery alias issue (short names)
+    is_likely_alias = any(len(t) <= 2 for t in invalid_tables_set)
+
+    return get_unknown_tables_feedback(
+        invalid_tables=invalid_tables_set,
+        allowed_tables=allowed_tables,
+        is_likely_alias=is_likely_alias
+    )
+
+
+def _column_not_found_case(error_message: str, msg_low: str, allowed_tables: Set[str]) -> Optional[str]:
+    """Case 5: Column not found (with alias detection)."""
+    if 'column' not in msg_low:
+        return None
+
+    match = _COLUMN_MISSING_RE.search(error_message)
+    if match:
+        return get_alias_reference_feedback(match.group(1))
+    return get_column_not_found_feedback()
+
+
+def _datetime_format_case(error_message: str, msg_low: str, allowed_tables: Set[str]) -> Optional[str]:
+    """Case 7: Datetime format issues."""
+    if 'format' not in msg_low:
+        return None
+    return get_datetime_format_feedback()
+
+
+# Case tag → handler. A handler returns None when its secondary condition
+# does not hold, letting the next matched case take over.
+_CASE_HANDLERS: Dict[str, Callable[[str, str, Set[str]], Optional[str]]] = {
+    'unknown_tables': _unknown_tables_case,
+    'multiple_statements': lambda *_: get_multiple_statements_feedback(),
+    'sql_comments': lambda *_: get_sql_comments_feedback(),
+    'forbidden_create': lambda *_: get_forbidden_keyword_feedback('CREATE'),
+    'column_not_found': _column_not_found_case,
+    'division_by_zero': lambda *_: get_division_by_zero_feedback(),
+    'datetime_format': _datetime_format_case,
+}
+
 
 def get_sql_error_feedback(error_message: str, allowed_tables: Set[str]) -> str:
     """
@@ -40,6 +115,9 @@ def get_sql_error_feedback(error_message: str, allowed_tables: Set[str]) -> str:
     
     This function routes error messages to appropriate feedback generators,
     providing specific guidance to help the LLM correct SQL generation errors.
+    A single regex pass finds every known trigger phrase; the matched cases
+    are then tried in priority order. Results are memoized, since retries
+    and repeated questions keep producing the same error strings.
     
     Args:
         error_message: Error string from query_result (e.g., "Error: column not found")
@@ -57,56 +135,20 @@ def get_sql_error_feedback(error_message: str, allowed_tables: Set[str]) -> str:
         This function is called during SQL retry attempts to provide
         error-specific guidance to the LLM for correction.
     """
-    
-    # Case 1: Unknown tables in query
-    if 'Unknown tables in query' in error_message:
-        match = re.search(r"Unknown tables in query: (\{.*?\})", error_message)
-        if match:
-            invalid_tables_str = match.group(1)
-            # Safe parsing: use ast.literal_eval instead of eval
-            try:
-                invalid_tables_set = ast.literal_eval(invalid_tables_str)
-            except (ValueError, SyntaxError):
-                logger.warning(f"Failed to parse invalid tables: {invalid_tables_str}")
-                return get_parsing_error_feedback(error_message)
-            
-            # Check if it's likely a subquery alias issue (short names)
-            is_likely_alias = any(len(t) <= 2 for t in invalid_tables_set)
-            
-            return get_unknown_tables_feedback(
-                invalid_tables=invalid_tables_set,
-                allowed_tables=allowed_tables,
-                is_likely_alias=is_likely_alias
-            )
-    
-    # Case 2: Multiple SQL statements
-    if 'Multiple SQL statements not allowed' in error_message:
-        return get_multiple_statements_feedback()
-    
-    # Case 3: SQL comments
-    if 'SQL comments not allowed' in error_message:
-        return get_sql_comments_feedback()
-    
-    # Case 4: Forbidden keywords (e.g., CREATE, DROP)
-    if 'Forbidden SQL keyword: CREATE' in error_message:
-        return get_forbidden_keyword_feedback('CREATE')
-    
-    # Case 5: Column not found (with alias detection)
-    if 'column' in error_message.lower() and 'does not exist' in error_message.lower():
-        match = re.search(r'column "(.+?)" does not exist', error_message)
-        if match:
-            column = match.group(1)
-            return get_alias_reference_feedback(column)
-        else:
-            return get_column_not_found_feedback()
-    
-    # Case 6: Division by zero
-    if 'division by zero' in error_message.lower():
-        return get_division_by_zero_feedback()
-    
-    # Case 7: Datetime format issues
-    if 'datetime' in error_message.lower() and 'format' in error_message.lower():
-        return get_datetime_format_feedback()
+    return _get_sql_error_feedback_cached(error_message, frozenset(allowed_tables))
+
+
+@functools.lru_cache(maxsize=512)
+def _get_sql_error_feedback_cached(error_message: str, allowed_tables: FrozenSet[str]) -> str:
+    """Memoized body of get_sql_error_feedback (feedback is a pure function of its inputs)."""
+    msg_low = error_message.lower()
+
+    matched_cases = {match.lastgroup for match in _ERROR_MARKER_RE.finditer(msg_low)}
+
+    for case in sorted(matched_cases, key=_CASE_PRIORITY.__getitem__):
+        feedback = _CASE_HANDLERS[case](error_message, msg_low, allowed_tables)
+        if feedback is not None:
+            return feedback
     
     # Default: Generic parsing error (catch-all)
     logger.debug(f"No specific error handler matched. Using generic feedback for: {error_message[:100]}...")
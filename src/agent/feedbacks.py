@@ -10,24 +10,88 @@ Usage:
     from .feedbacks import get_unknown_tables_feedback, get_multiple_statements_feedback
 """
 
+import functools
 
-def get_unknown_tables_feedback(invalid_tables: set, allowed_tables: set, is_likely_alias: bool = False) -> str:
-    """
-    Generate feedback for "Unknown tables in query" error.
+from src.agent.config import MAX_SQL_RETRIES
 
-    Args:
-        invalid_tables: Set of invalid table names that were used
-        allowed_tables: Set of valid table names from schema
-        is_likely_alias: True if invalid_tables are short names (1-2 chars) that look like aliases
+# Static feedbacks are built once at import; only parameterised feedbacks
+# are formatted per call.
+_FEEDBACK_MULTIPLE_STATEMENTS = """
 
-    Returns:
-        Formatted feedback string to append to SQL generation prompt
+**CRITICAL FIX REQUIRED:**
+Your previous attempt had multiple SQL statements (separated by semicolons).
+
+Generate EXACTLY ONE query. Use CTE (WITH clause) for multi-step logic:
+
+Example:
+WITH temp AS (
+    SELECT "entity_id", SUM("amount") as total
+    FROM transactions
+    GROUP BY "entity_id"
+)
+SELECT e."name", t.total
+FROM entities e
+JOIN temp t ON e."id" = t."entity_id"
+
+Do NOT use:
+CREATE TEMP TABLE temp AS (...);
+SELECT * FROM temp;
+"""
+
+_FEEDBACK_SQL_COMMENTS = """
+
+**CRITICAL FIX REQUIRED:**
+Your previous attempt had SQL comments (-- or /* */).
+
+Remove ALL comments. Return ONLY the SQL query with no explanations.
+
+Do NOT include:
+- Line comments: -- This is a comment
+- Block comments: /* This is a comment */
+- Explanatory text before or after the query
+
+Return ONLY valid SQL inside <sql></sql> tags.
+"""
+
+_FEEDBACK_DIVISION_BY_ZERO = """
+    **Fix: Division by Zero Error**
+    - You are trying to divide by a value that is ZERO (likely STDDEV, SUM, or COUNT).
+    - Use `NULLIF(column, 0)` to handle division by zero safely.
+    - Example: `col_a / NULLIF(col_b, 0)` -> Returns NULL instead of error.
+    - Particularly common when calculating SKEWNESS or normalisation where STDDEV can be 0.
     """
-    invalid_str = str(invalid_tables)
 
-    if is_likely_alias:
-        # Short names like 'it', 't', 'x' - likely subquery alias issue
-        return f"""
+_FEEDBACK_DATETIME_FORMAT = """
+    **Fix: Datetime Format Error**
+    - The 'dateTime' column is TEXT and may contain ISO formats (e.g., '2023-01-01T12:00:00').
+    - Your format string in TO_TIMESTAMP() failed.
+    - SOLUTION: Use direct casting instead: `"dateTime"::timestamp`
+    - PostgreSQL handles ISO formats automatically when casting.
+    """
+
+_FEEDBACK_FORBIDDEN_CREATE = """
+
+**CRITICAL FIX REQUIRED:**
+Your previous attempt used CREATE TEMP TABLE.
+
+Use CTE (WITH clause) instead:
+
+Example:
+WITH temp AS (
+    SELECT "item_id", COUNT(*) as record_count
+    FROM transactions
+    GROUP BY "item_id"
+)
+SELECT * FROM temp WHERE record_count > 10
+
+CTEs are temporary and automatically cleaned up after the query.
+"""
+
+_FORBIDDEN_KEYWORD_FEEDBACKS = {'CREATE': _FEEDBACK_FORBIDDEN_CREATE}
+
+# Parameterised feedbacks are module-level templates filled via str.format_map,
+# so only the variable parts are written per call.
+_UNKNOWN_TABLES_ALIAS_TEMPLATE = """
 
 **CRITICAL FIX REQUIRED:**
 Your previous attempt used a subquery with alias {invalid_str}, which caused a validation error.
@@ -41,12 +105,10 @@ WITH ranked AS (
 )
 SELECT * FROM ranked WHERE rank = 1
 
-Do NOT use: FROM (SELECT ...) AS {list(invalid_tables)[0]}
+Do NOT use: FROM (SELECT ...) AS {first_alias}
 """
-    else:
-        # Longer names - actual non-existent table names
-        allowed_list = ', '.join(f'"{t}"' for t in sorted(allowed_tables))
-        return f"""
+
+_UNKNOWN_TABLES_REAL_TEMPLATE = """
 
 **CRITICAL FIX REQUIRED:**
 Your previous attempt used invalid table(s): {invalid_str}
@@ -62,58 +124,135 @@ Rules:
 - Copy table names EXACTLY as shown above
 """
 
+_COLUMN_NOT_FOUND_TEMPLATE = """
 
-def get_multiple_statements_feedback() -> str:
-    """
-    Generate feedback for "Multiple SQL statements not allowed" error.
+**CRITICAL FIX REQUIRED:**
+Your previous attempt referenced a non-existent column{column_info}.
 
-    Returns:
-        Formatted feedback string
+PostgreSQL column name rules:
+1. Unquoted names are converted to LOWERCASE
+   - customerName → customername (fails if actual column is "customerName")
+
+2. ALWAYS use double quotes for exact matching:
+   - ✓ SELECT t."customerName" FROM table t
+   - ✗ SELECT t.customerName FROM table t
+
+3. Column names are CASE-SENSITIVE when quoted:
+   - "CustomerName" ≠ "customername" ≠ "CUSTOMERNAME"
+
+4. Check the schema for exact column names and quote them correctly.
+
+Example:
+SELECT t."recordID", e."entityName", t."totalAmount"
+FROM transactions t
+JOIN entities e ON t."entityID" = e."id"
+"""
+
+_ALIAS_REFERENCE_TEMPLATE = """
+    **Fix: Alias Reference Error ("{column_name}" does not exist)**
+    - You defined "{column_name}" as an ALIAS in the SELECT clause (e.g., `... AS {column_name}`).
+    - You CANNOT use an alias in the same SELECT or WHERE clause.
+    - **Solution:** Wrap the calculation in a CTE or Subquery first.
+    - Example:
+      WITH stats AS (SELECT a+b AS my_alias FROM table)
+      SELECT * FROM stats WHERE my_alias > 10
     """
-    return """
+
+_PARSING_ERROR_TEMPLATE = """
 
 **CRITICAL FIX REQUIRED:**
-Your previous attempt had multiple SQL statements (separated by semicolons).
+Your previous attempt had a SQL syntax error: {error_message}
 
-Generate EXACTLY ONE query. Use CTE (WITH clause) for multi-step logic:
+Common syntax issues:
+1. Missing quotes around column names with special characters
+2. Incorrect JOIN syntax
+3. Missing GROUP BY for aggregated columns
+4. Mismatched parentheses in subqueries/CTEs
 
-Example:
-WITH temp AS (
-    SELECT "entity_id", SUM("amount") as total
-    FROM transactions
-    GROUP BY "entity_id"
-)
-SELECT e."name", t.total
-FROM entities e
-JOIN temp t ON e."id" = t."entity_id"
+Steps to fix:
+1. Review the error message carefully
+2. Check your SQL syntax against PostgreSQL standards
+3. Ensure all column names are quoted: t."columnName"
+4. Verify JOIN conditions are correct
+5. Make sure GROUP BY includes all non-aggregated SELECT columns
+"""
 
-Do NOT use:
-CREATE TEMP TABLE temp AS (...);
-SELECT * FROM temp;
+_FINAL_RETRY_TEMPLATE = """
+
+**FINAL ATTEMPT (Retry {retry_count}/{max_retries}):**
+This is your last chance to generate a valid SQL query.
+
+Review the error message carefully and:
+1. Use ONLY exact table names from the schema
+2. Quote ALL column names with double quotes: "columnName"
+3. Use CTEs instead of subqueries
+4. Generate exactly ONE SELECT query
+5. Do NOT include comments or explanations
+
+If you're uncertain, prefer a simpler query that you're confident will work.
 """
 
+_RETRY_TEMPLATE = """
 
-def get_sql_comments_feedback() -> str:
+**RETRY ATTEMPT {retry_count}/{max_retries}:**
+Your previous SQL query failed validation.
+
+Carefully read the error message above and fix the specific issue mentioned.
+"""
+
+
+@functools.lru_cache(maxsize=32)
+def _allowed_list(allowed_tables: frozenset) -> str:
+    """Sorted, quoted table listing (cached per schema)."""
+    return ', '.join(f'"{t}"' for t in sorted(allowed_tables))
+
+
+def get_unknown_tables_feedback(invalid_tables: set, allowed_tables: set, is_likely_alias: bool = False) -> str:
     """
-    Generate feedback for "SQL comments not allowed" error.
+    Generate feedback for "Unknown tables in query" error.
+
+    Args:
+        invalid_tables: Set of invalid table names that were used
+        allowed_tables: Set of valid table names from schema
+        is_likely_alias: True if invalid_tables are short names (1-2 chars) that look like aliases
 
     Returns:
-        Formatted feedback string
+        Formatted feedback string to append to SQL generation prompt
     """
-    return """
+    invalid_str = str(invalid_tables)
 
-**CRITICAL FIX REQUIRED:**
-Your previous attempt had SQL comments (-- or /* */).
+    if is_likely_alias:
+        # Short names like 'it', 't', 'x' - likely subquery alias issue
+        return _UNKNOWN_TABLES_ALIAS_TEMPLATE.format_map({
+            'invalid_str': invalid_str,
+            'first_alias': next(iter(invalid_tables)),
+        })
+    else:
+        # Longer names - actual non-existent table names
+        return _UNKNOWN_TABLES_REAL_TEMPLATE.format_map({
+            'invalid_str': invalid_str,
+            'allowed_list': _allowed_list(frozenset(allowed_tables)),
+        })
 
-Remove ALL comments. Return ONLY the SQL query with no explanations.
 
-Do NOT include:
-- Line comments: -- This is a comment
-- Block comments: /* This is a comment */
-- Explanatory text before or after the query
+def get_multiple_statements_feedback() -> str:
+    """
+    Generate feedback for "Multiple SQL statements not allowed" error.
 
-Return ONLY valid SQL inside <sql></sql> tags.
-"""
+    Returns:
+        Formatted feedback string
+    """
+    return _FEEDBACK_MULTIPLE_STATEMENTS
+
+
+def get_sql_comments_feedback() -> str:
+    """
+    Generate feedback for "SQL comments not allowed" error.
+
+    Returns:
+        Formatted feedback string
+    """
+    return _FEEDBACK_SQL_COMMENTS
 
 
 def get_forbidden_keyword_feedback(keyword: str = 'CREATE') -> str:
@@ -126,26 +265,10 @@ def get_forbidden_keyword_feedback(keyword: str = 'CREATE') -> str:
     Returns:
         Formatted feedback string
     """
-    if keyword == 'CREATE':
-        return """
-
-**CRITICAL FIX REQUIRED:**
-Your previous attempt used CREATE TEMP TABLE.
-
-Use CTE (WITH clause) instead:
-
-Example:
-WITH temp AS (
-    SELECT "item_id", COUNT(*) as record_count
-    FROM transactions
-    GROUP BY "item_id"
-)
-SELECT * FROM temp WHERE record_count > 10
+    if keyword in _FORBIDDEN_KEYWORD_FEEDBACKS:
+        return _FORBIDDEN_KEYWORD_FEEDBACKS[keyword]
 
-CTEs are temporary and automatically cleaned up after the query.
-"""
-    else:
-        return f"""
+    return f"""
 
 **CRITICAL FIX REQUIRED:**
 Your previous attempt used forbidden keyword: {keyword}
@@ -175,68 +298,26 @@ def get_column_not_found_feedback(column_name: str = None) -> str:
         Formatted feedback string
     """
     column_info = f" '{column_name}'" if column_name else ""
-    return f"""
-
-**CRITICAL FIX REQUIRED:**
-Your previous attempt referenced a non-existent column{column_info}.
-
-PostgreSQL column name rules:
-1. Unquoted names are converted to LOWERCASE
-   - customerName → customername (fails if actual column is "customerName")
-
-2. ALWAYS use double quotes for exact matching:
-   - ✓ SELECT t."customerName" FROM table t
-   - ✗ SELECT t.customerName FROM table t
-
-3. Column names are CASE-SENSITIVE when quoted:
-   - "CustomerName" ≠ "customername" ≠ "CUSTOMERNAME"
-
-4. Check the schema for exact column names and quote them correctly.
-
-Example:
-SELECT t."recordID", e."entityName", t."totalAmount"
-FROM transactions t
-JOIN entities e ON t."entityID" = e."id"
-"""
+    return _COLUMN_NOT_FOUND_TEMPLATE.format_map({'column_info': column_info})
 
 
 def get_division_by_zero_feedback() -> str:
     """
     Generate feedback for "Division by zero" error.
     """
-    return """
-    **Fix: Division by Zero Error**
-    - You are trying to divide by a value that is ZERO (likely STDDEV, SUM, or COUNT).
-    - Use `NULLIF(column, 0)` to handle division by zero safely.
-    - Example: `col_a / NULLIF(col_b, 0)` -> Returns NULL instead of error.
-    - Particularly common when calculating SKEWNESS or normalisation where STDDEV can be 0.
-    """
+    return _FEEDBACK_DIVISION_BY_ZERO
 
 def get_datetime_format_feedback() -> str:
     """
     Generate feedback for datetime format errors.
     """
-    return """
-    **Fix: Datetime Format Error**
-    - The 'dateTime' column is TEXT and may contain ISO formats (e.g., '2023-01-01T12:00:00').
-    - Your format string in TO_TIMESTAMP() failed.
-    - SOLUTION: Use direct casting instead: `"dateTime"::timestamp`
-    - PostgreSQL handles ISO formats automatically when casting.
-    """
+    return _FEEDBACK_DATETIME_FORMAT
 
 def get_alias_reference_feedback(column_name: str) -> str:
     """
     Generate feedback for "column does not exist" when it's likely an alias issue.
     """
-    return f"""
-    **Fix: Alias Reference Error ("{column_name}" does not exist)**
-    - You defined "{column_name}" as an ALIAS in the SELECT clause (e.g., `... AS {column_name}`).
-    - You CANNOT use an alias in the same SELECT or WHERE clause.
-    - **Solution:** Wrap the calculation in a CTE or Subquery first.
-    - Example:
-      WITH stats AS (SELECT a+b AS my_alias FROM table)
-      SELECT * FROM stats WHERE my_alias > 10
-    """
+    return _ALIAS_REFERENCE_TEMPLATE.format_map({'column_name': column_name})
 
 def get_parsing_error_feedback(error_message: str) -> str:
     """
@@ -248,24 +329,25 @@ def get_parsing_error_feedback(error_message: str) -> str:
     Returns:
         Formatted feedback string
     """
-    return f"""
+    return _PARSING_ERROR_TEMPLATE.format_map({'error_message': error_message})
 
-**CRITICAL FIX REQUIRED:**
-Your previous attempt had a SQL syntax error: {error_message}
 
-Common syntax issues:
-1. Missing quotes around column names with special characters
-2. Incorrect JOIN syntax
-3. Missing GROUP BY for aggregated columns
-4. Mismatched parentheses in subqueries/CTEs
+def _build_retry_feedback(retry_count: int, max_retries: int) -> str:
+    """Format the retry feedback for one (retry_count, max_retries) pair."""
+    counts = {'retry_count': retry_count, 'max_retries': max_retries}
+
+    if retry_count >= max_retries - 1:
+        # Last attempt
+        return _FINAL_RETRY_TEMPLATE.format_map(counts)
+    else:
+        return _RETRY_TEMPLATE.format_map(counts)
 
-Steps to fix:
-1. Review the error message carefully
-2. Check your SQL syntax against PostgreSQL standards
-3. Ensure all column names are quoted: t."columnName"
-4. Verify JOIN conditions are correct
-5. Make sure GROUP BY includes all non-aggregated SELECT columns
-"""
+
+# Every pair reachable with the configured retry limit, rendered once
+_RETRY_FEEDBACKS = {
+    (retry_count, MAX_SQL_RETRIES): _build_retry_feedback(retry_count, MAX_SQL_RETRIES)
+    for retry_count in range(MAX_SQL_RETRIES + 1)
+}
 
 
 def get_generic_retry_feedback(retry_count: int, max_retries: int) -> str:
@@ -279,27 +361,7 @@ def get_generic_retry_feedback(retry_count: int, max_retries: int) -> str:
     Returns:
         Formatted feedback string
     """
-    if retry_count >= max_retries - 1:
-        # Last attempt
-        return f"""
-
-**FINAL ATTEMPT (Retry {retry_count}/{max_retries}):**
-This is your last chance to generate a valid SQL query.
-
-Review the error message carefully and:
-1. Use ONLY exact table names from the schema
-2. Quote ALL column names with double quotes: "columnName"
-3. Use CTEs instead of subqueries
-4. Generate exactly ONE SELECT query
-5. Do NOT include comments or explanations
-
-If you're uncertain, prefer a simpler query that you're confident will work.
-"""
-    else:
-        return f"""
-
-**RETRY ATTEMPT {retry_count}/{max_retries}:**
-Your previous SQL query failed validation.
-
-Carefully read the error message above and fix the specific issue mentioned.
-"""
+    feedback = _RETRY_FEEDBACKS.get((retry_count, max_retries))
+    if feedback is None:
+        feedback = _build_retry_feedback(retry_count, max_retries)
+    return feedback
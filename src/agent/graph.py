@@ -1,3 +1,5 @@
+import functools
+
 from langgraph.graph import START, StateGraph, END
 from src.agent.state import SQLAgentState
 from src.agent.nodes import (
@@ -10,67 +12,81 @@ from src.agent.nodes import (
     visualisation_request_classification,
     generate_pyodide_analysis,
     pyodide_request_classification,
-    enable_pyodide_fallback,
-)
-from src.agent.routing import RouteDecider
-from src.agent.config import MAX_SQL_RETRIES
-
-
-# Defined state is put into the StateGraph -> workflow is a StateGraph object
-workflow = StateGraph(SQLAgentState)
-
-
-# Add NODES to the workflow
-workflow.add_node("read_question", read_question)
-workflow.add_node("intent_classification", intent_classification)
-workflow.add_node("generate_SQL", generate_SQL)
-workflow.add_node("execute_SQL", execute_SQL)
-workflow.add_node("visualisation_request_classification", visualisation_request_classification)
-workflow.add_node("pyodide_request_classification", pyodide_request_classification)
-workflow.add_node("generate_response", generate_response)
-workflow.add_node("generate_general_response", generate_general_response)
-workflow.add_node("generate_pyodide_analysis", generate_pyodide_analysis)
-workflow.add_node("enable_pyodide_fallback", enable_pyodide_fallback)
-
-# Add EDGES to the workflow
-workflow.add_edge(START, "read_question")
-workflow.add_edge("read_question", "intent_classification")
-
-workflow.add_conditional_edges(
-    "intent_classification",
-    RouteDecider.decide_intent_route,
-    {"sql": "pyodide_request_classification", "general": "generate_general_response"}
 )
 
-workflow.add_conditional_edges(
-    "pyodide_request_classification",
-    RouteDecider.decide_pyodide_route,
-    {"pyodide": "generate_SQL", "skip": "generate_SQL"}
-)
 
-workflow.add_edge("generate_SQL", "execute_SQL")
+def build_workflow() -> StateGraph:
+    """Register the agent's nodes and edges on a fresh StateGraph."""
+    # Defined state is put into the StateGraph -> workflow is a StateGraph object
+    workflow = StateGraph(SQLAgentState)
 
-workflow.add_conditional_edges(
-    "execute_SQL",
-    lambda state: RouteDecider.decide_sql_retry_route(state, MAX_SQL_RETRIES),
-    {
-        "retry": "generate_SQL",
-        "success": "visualisation_request_classification",
-        "fallback": "enable_pyodide_fallback"
-    }
-)
+    # Add NODES to the workflow
+    workflow.add_node("read_question", read_question)
+    workflow.add_node("intent_classification", intent_classification)
+    workflow.add_node("generate_SQL", generate_SQL)
+    workflow.add_node("execute_SQL", execute_SQL)
+    workflow.add_node("visualisation_request_classification", visualisation_request_classification)
+    workflow.add_node("pyodide_request_classification", pyodide_request_classification)
+    workflow.add_node("generate_response", generate_response)
+    workflow.add_node("generate_general_response", generate_general_response)
+    workflow.add_node("generate_pyodide_analysis", generate_pyodide_analysis)
 
-# Pyodide fallback: reset state and retry with simple SQL
-workflow.add_edge("enable_pyodide_fallback", "generate_SQL")
+    # Add EDGES to the workflow
+    workflow.add_edge(START, "read_question")
+    # Intent and Pyodide classification only read user_question, so they run
+    # in the same superstep; the Pyodide keyword scan then costs no latency
+    workflow.add_edge("read_question", "intent_classification")
+    workflow.add_edge("read_question", "pyodide_request_classification")
+    workflow.add_edge("pyodide_request_classification", END)
 
-workflow.add_conditional_edges(
-    "visualisation_request_classification",
-    RouteDecider.decide_pyodide_route,
-    {"pyodide": "generate_pyodide_analysis", "skip": "generate_response"}
-)
+    # intent_classification and execute_SQL route themselves by returning
+    # Command(goto=...); their possible targets come from the
+    # Command[Literal[...]] return annotations. On success execute_SQL fans
+    # out to the chart and Pyodide branches, which run in parallel; on Pyodide
+    # fallback it resets the SQL state in the same update and returns to
+    # generate_SQL.
+
+    # For sql intent, intent_classification goes straight to generate_SQL;
+    # needs_pyodide (already written in the previous superstep) only selects
+    # the prompt
+    workflow.add_edge("generate_SQL", "execute_SQL")
+
+    # generate_response joins the branches: both finish in the same superstep,
+    # so it runs once, after them, and the answer is always the last message
+    workflow.add_edge("visualisation_request_classification", "generate_response")
+    workflow.add_edge("generate_pyodide_analysis", "generate_response")
+    workflow.add_edge("generate_response", END)
+    workflow.add_edge("generate_general_response", END)
+
+    return workflow
+
+
+workflow = build_workflow()
+
+
+@functools.cache
+def get_app(checkpointer=None):
+    """
+    Return the compiled workflow, compiling it only on the first call.
+
+    Compilation validates every node/edge and wires the Pregel channels, so
+    callers share one compiled graph per process (per checkpointer) instead
+    of recompiling.
+
+    Args:
+        checkpointer: Optional LangGraph checkpointer. The default (None) skips
+            checkpoint writes entirely, which is all a stateless request needs.
+            Savers that guard their connection with an instance-level lock
+            (e.g. AsyncPostgresSaver) serialise every task sharing them, so
+            use MemorySaver for request-scoped threads and give each task its
+            own Postgres saver only where durable history is required.
+    """
+    return workflow.compile(checkpointer=checkpointer)
 
-workflow.add_edge("generate_pyodide_analysis", "generate_response")
-workflow.add_edge("generate_response", END)
-workflow.add_edge("generate_general_response", END)
 
-app = workflow.compile()
\ No newline at end of file
+def __getattr__(name):
+    """Compile on first access to `app` (PEP 562), keeping imports cheap."""
+    # Entry point referenced by langgraph.json
+    if name == 'app':
+        return get_app()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
@@ -5,47 +5,167 @@ This module contains reusable helper functions that were extracted from nodes.py
 to keep node logic focused and more maintainable.
 
 Functions:
-- get_cached_engine(): Database connection pool management
+- get_cached_engine(): Async database connection pool management
 - load_schema_info(): Schema loading with caching
+- get_allowed_tables(): Cached table names for SQL validation
 - apply_pii_masking(): PII data masking for privacy protection
+- coalesced_ainvoke(): Share one in-flight LLM call between identical prompts
+- get_sql_cache() / sql_cache_key(): Reuse SQL generated for a repeated question
+- get_intent_cache(): Reuse the intent classification of a repeated question
+- get_vis_cache(): Reuse the chart decision for a repeated question and result shape
+- get_pyodide_code_cache(): Reuse analysis code for a repeated question and result shape
+- get_chart_cache() / chart_cache_key(): Reuse the rendered chart for an identical result
 """
 
-import os
-import json
-from typing import Optional
-from sqlalchemy import Engine
-from src.core.db import get_db_engine
+import re
+import asyncio
+import hashlib
+import itertools
+import time
+import orjson
+from collections import OrderedDict
+from pathlib import Path
+from typing import Any, Dict, FrozenSet, Hashable, Optional, Sequence, Tuple, Union
+from sqlalchemy.ext.asyncio import AsyncEngine
+from src.core.db import get_async_db_engine, DatabaseConfig
 from src.core.logger import setup_logger
 from src.core.errors import SchemaLoadError
+from src.agent.config import (
+    SQL_CACHE_SIZE, INTENT_CACHE_SIZE, VIS_CACHE_SIZE, PYODIDE_CODE_CACHE_SIZE,
+    CHART_CACHE_SIZE, CACHE_TTL_SECONDS, PII_LOG_EVERY
+)
 
 logger = setup_logger('cadet.helpers')
 
 # File paths (exported for use in nodes.py)
-BASE_DIR = os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
-SRC_DIR = os.path.join(BASE_DIR, 'src')
-SCHEMA_JSON_PATH = os.path.join(SRC_DIR, 'config', 'schema_info.json')
+BASE_DIR = Path(__file__).resolve().parents[2]
+SRC_DIR = BASE_DIR / 'src'
+SCHEMA_JSON_PATH = SRC_DIR / 'config' / 'schema_info.json'
 
-# Module-level caches
+# Module-level caches (schema_info.json is parsed once into _SCHEMA_DATA)
+_SCHEMA_DATA: Optional[dict] = None
 _SCHEMA_CACHE: Optional[str] = None
-_DB_ENGINE: Optional[Engine] = None
+_SCHEMA_HASH: Optional[bytes] = None  # blake2b of _SCHEMA_CACHE, for cache keys
+_DB_ENGINE: Optional[AsyncEngine] = None
 
+# Masking runs on every SQL result: only 1 in PII_LOG_EVERY calls is logged
+_MASK_LOG_COUNTER = itertools.count()
+_PII_COLUMNS: Optional[FrozenSet[str]] = None
+_ALLOWED_TABLES: Optional[FrozenSet[str]] = None
+_INFLIGHT_LLM_CALLS: Dict[Tuple[int, Hashable], asyncio.Task] = {}
 
-def get_cached_engine() -> Engine:
+_WHITESPACE_RE = re.compile(r'\s+')
+
+
+class LRUCache:
+    """
+    Bounded mapping that evicts the least recently used entry when full.
+
+    Used for values that are expensive to produce (LLM output) and cheap to
+    key. With `ttl` set, entries also expire that many seconds after being
+    stored. Not thread-safe; the agent runs its nodes on a single event loop.
     """
-    Get or create cached database engine.
+
+    def __init__(self, maxsize: int, ttl: Optional[float] = None):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: OrderedDict = OrderedDict()  # key -> (value, expires_at)
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        """Return the cached value (marking it recently used) or None."""
+        entry = self._data.get(key)
+        if entry is None:
+            return None
+
+        value, expires_at = entry
+        if expires_at is not None and time.monotonic() >= expires_at:
+            del self._data[key]
+            return None
+
+        self._data.move_to_end(key)
+        return value
+
+    def put(self, key: Hashable, value: Any) -> None:
+        """Store a value, evicting the oldest entry if over capacity."""
+        expires_at = time.monotonic() + self.ttl if self.ttl else None
+        self._data[key] = (value, expires_at)
+        self._data.move_to_end(key)
+        if len(self._data) > self.maxsize:
+            self._data.popitem(last=False)
+
+    def discard(self, key: Hashable) -> None:
+        """Drop a key if present."""
+        self._data.pop(key, None)
+
+    def clear(self) -> None:
+        self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+
+# SQL that executed successfully, per (question, schema, prompt variant)
+_SQL_CACHE = LRUCache(maxsize=SQL_CACHE_SIZE)
+# Classification verdict per normalized question
+_INTENT_CACHE = LRUCache(maxsize=INTENT_CACHE_SIZE, ttl=CACHE_TTL_SECONDS)
+# Chart type and title per (normalized question, result columns)
+_VIS_CACHE = LRUCache(maxsize=VIS_CACHE_SIZE, ttl=CACHE_TTL_SECONDS)
+# Generated Pyodide analysis code per (normalized question, result columns)
+_PYODIDE_CODE_CACHE = LRUCache(maxsize=PYODIDE_CODE_CACHE_SIZE, ttl=CACHE_TTL_SECONDS)
+# Plotly JSON per (question, chart type, chart title, query result digest)
+_CHART_CACHE = LRUCache(maxsize=CHART_CACHE_SIZE, ttl=CACHE_TTL_SECONDS)
+
+
+def get_cached_engine() -> AsyncEngine:
+    """
+    Get or create cached async database engine.
     
     Uses a module-level global variable `_DB_ENGINE` to store the connection pool,
-    preventing overhead from recreating engines on every request.
+    preventing overhead from recreating engines on every request. The pool is
+    sized for concurrent agent traffic (see DatabaseConfig.get_pool_settings).
     
     Returns:
-        sqlalchemy.Engine: Active database engine instance
+        sqlalchemy.ext.asyncio.AsyncEngine: asyncpg-backed engine instance
     """
     global _DB_ENGINE
     if _DB_ENGINE is None:
-        _DB_ENGINE = get_db_engine()
+        _DB_ENGINE = get_async_db_engine(**DatabaseConfig.get_pool_settings())
+        logger.info("Database pool ready: %s", _DB_ENGINE.sync_engine.pool.status())
     return _DB_ENGINE
 
 
+def _load_schema_data() -> dict:
+    """
+    Parse schema_info.json once and cache the whole document.
+
+    The LLM prompt and the PII column lists both come from this single parse.
+
+    Returns:
+        dict: Parsed schema_info.json
+
+    Raises:
+        SchemaLoadError: If schema file not found or invalid
+    """
+    global _SCHEMA_DATA
+
+    if _SCHEMA_DATA is not None:
+        return _SCHEMA_DATA
+
+    # No separate exists() stat: a missing file surfaces from open() itself
+    try:
+        with open(SCHEMA_JSON_PATH, 'rb') as f:
+            _SCHEMA_DATA = orjson.loads(f.read())
+    except FileNotFoundError:
+        raise SchemaLoadError(
+            f"{SCHEMA_JSON_PATH} not found.\n"
+            "Please run: python src/generate_schema.py"
+        )
+    except orjson.JSONDecodeError as e:  # Subclass of json.JSONDecodeError
+        raise SchemaLoadError(f"Invalid JSON in schema file: {e}")
+
+    return _SCHEMA_DATA
+
+
 def load_schema_info() -> str:
     """
     Load pre-generated schema info from schema_info.json with caching.
@@ -59,89 +179,245 @@ def load_schema_info() -> str:
     Raises:
         SchemaLoadError: If schema file not found or invalid
     """
-    global _SCHEMA_CACHE
+    global _SCHEMA_CACHE, _SCHEMA_HASH
 
     if _SCHEMA_CACHE is not None:
         return _SCHEMA_CACHE
 
-    if not os.path.exists(SCHEMA_JSON_PATH):
-        raise SchemaLoadError(
-            f"{SCHEMA_JSON_PATH} not found.\n"
-            "Please run: python src/generate_schema.py"
-        )
+    llm_prompt = _load_schema_data().get('llm_prompt', '')
 
-    try:
-        with open(SCHEMA_JSON_PATH, 'r', encoding='utf-8') as f:
-            schema_data = json.load(f)
+    if not llm_prompt:
+        raise SchemaLoadError("Empty llm_prompt in schema_info.json")
 
-        _SCHEMA_CACHE = schema_data.get('llm_prompt', '')
+    # Hashed once here rather than on every SQL cache lookup
+    _SCHEMA_HASH = hashlib.blake2b(llm_prompt.encode('utf-8'), digest_size=16).digest()
+    _SCHEMA_CACHE = llm_prompt
+    logger.info("Schema info loaded and cached")
+    return _SCHEMA_CACHE
 
-        if not _SCHEMA_CACHE:
-            raise SchemaLoadError("Empty llm_prompt in schema_info.json")
 
-        logger.info("Schema info loaded and cached")
-        return _SCHEMA_CACHE
+def get_allowed_tables() -> FrozenSet[str]:
+    """
+    Return the schema's table names, used to reject hallucinated tables.
 
-    except json.JSONDecodeError as e:
-        raise SchemaLoadError(f"Invalid JSON in schema file: {e}")
+    Derived once from the cached schema parse, so generate_SQL no longer
+    reopens schema_info.json on every call.
+
+    Returns:
+        frozenset: Valid table names
+
+    Raises:
+        SchemaLoadError: If schema file not found, invalid or has no tables
+    """
+    global _ALLOWED_TABLES
+
+    if _ALLOWED_TABLES is not None:
+        return _ALLOWED_TABLES
+
+    tables = _load_schema_data().get('tables')
+
+    if not tables:
+        raise SchemaLoadError("No tables in schema_info.json")
+
+    _ALLOWED_TABLES = frozenset(tables)
+    return _ALLOWED_TABLES
+
+
+def _get_pii_columns() -> FrozenSet[str]:
+    """
+    Build the flattened set of PII column names once and cache it.
+
+    Columns are matched table-agnostically, so the per-table lists in
+    schema_info.json are merged into one frozenset. Reuses the cached schema
+    parse; a missing or invalid file yields an empty set (masking disabled),
+    like an empty config. That empty set is not cached, so a transient read
+    failure does not switch masking off for the life of the process.
+
+    Returns:
+        frozenset: PII column names
+    """
+    global _PII_COLUMNS
+
+    if _PII_COLUMNS is not None:
+        return _PII_COLUMNS
+
+    try:
+        pii_columns_config = _load_schema_data().get('pii_columns', {})
+    except SchemaLoadError:
+        logger.debug("No PII configuration found, skipping masking")
+        return frozenset()
+
+    _PII_COLUMNS = frozenset(
+        column for table_pii in pii_columns_config.values() for column in table_pii
+    )
+    return _PII_COLUMNS
 
 
 def apply_pii_masking(rows: list[dict]) -> list[dict]:
     """
     Apply deterministic PII masking to SQL results (Python-only, no LLM).
 
-    Loads PII column names from schema_info.json and masks matching columns
-    with "Person #N" format. Removes duplicate name fields (e.g., firstName + lastName).
+    Uses the cached PII column names from schema_info.json and masks matching
+    columns with "Person #N" format. Removes duplicate name fields (e.g., firstName + lastName).
 
     Args:
-        rows: SQL query results as list of dicts
+        rows: SQL query results as list of dicts (modified in place)
 
     Returns:
-        Masked rows with PII replaced
+        The same rows with PII replaced
     """
     if not rows:
         return rows
 
-    # Load PII columns from schema_info.json
-    try:
-        with open(SCHEMA_JSON_PATH, 'r', encoding='utf-8') as f:
-            schema_data = json.load(f)
-        pii_columns_config = schema_data.get('pii_columns', {})
-    except (FileNotFoundError, json.JSONDecodeError, KeyError):
-        logger.debug("No PII configuration found, skipping masking")
-        return rows
-
-    # Flatten all PII columns into a single set (table-agnostic matching)
-    pii_columns = set()
-    for table_pii in pii_columns_config.values():
-        pii_columns.update(table_pii)
+    pii_columns = _get_pii_columns()
 
     if not pii_columns:
         return rows
 
-    logger.info(f"Masking PII columns: {pii_columns}")
+    # SQL result rows all share the same columns, so check the first row
+    # only. Most results (aggregates, counts) contain no PII at all: a single
+    # C-level disjointness test returns them untouched.
+    if pii_columns.isdisjoint(rows[0]):
+        return rows
+
+    # Ordered, so the first PII column in the result is the one kept
+    present_pii = [col for col in rows[0] if col in pii_columns]
+
+    log_sample = next(_MASK_LOG_COUNTER) % PII_LOG_EVERY == 0
+    if log_sample:
+        logger.info("Masking PII columns: %s", present_pii)
 
-    # Apply masking
-    masked_rows = []
-    person_counter = 1
+    # Keep the first PII column as the "Person #N" label and drop the others
+    # (e.g., lastName after firstName). Rows are updated in place: they are
+    # freshly built per query, and only the PII cells need touching. Plain
+    # dicts rather than a DataFrame, which would turn NULL integers into NaN.
+    keep_col = present_pii[0]
+    drop_cols = present_pii[1:]
 
-    for row in rows:
-        masked_row = {}
-        first_pii_found = False
+    for person_number, row in enumerate(rows, start=1):
+        row[keep_col] = f"Person #{person_number}"
+        for col_name in drop_cols:
+            row.pop(col_name, None)
 
-        for col_name, value in row.items():
-            if col_name in pii_columns:
-                if not first_pii_found:
-                    masked_row[col_name] = f"Person #{person_counter}"
-                    first_pii_found = True
-                # Skip other PII columns in same row (e.g., lastName after firstName)
-            else:
-                masked_row[col_name] = value
+    if log_sample:
+        logger.info("Masked %d individuals", len(rows))
+    return rows
 
-        if first_pii_found:
-            person_counter += 1
 
-        masked_rows.append(masked_row)
+async def coalesced_ainvoke(llm: Any, prompt: Union[str, Sequence[Any]]) -> Any:
+    """
+    Invoke an LLM, sharing the call with any identical request already in flight.
+
+    The chat completions API takes one conversation per request, so concurrent
+    questions cannot be packed into a single call. Under load, however, the
+    same question often arrives several times at once (retries, page reloads,
+    many users asking the default examples). Those callers await one request
+    instead of each paying a full round-trip.
+
+    Args:
+        llm: Chat model exposing `ainvoke`
+        prompt: Fully rendered prompt string, or a list of chat messages
+
+    Returns:
+        The model response (shared between coalesced callers)
+    """
+    if isinstance(prompt, str):
+        key = (id(llm), prompt)
+    else:
+        key = (id(llm), tuple((message.type, message.content) for message in prompt))
+    task = _INFLIGHT_LLM_CALLS.get(key)
+    if task is None:
+        task = asyncio.ensure_future(llm.ainvoke(prompt))
+        _INFLIGHT_LLM_CALLS[key] = task
+        task.add_done_callback(lambda _: _INFLIGHT_LLM_CALLS.pop(key, None))
+    else:
+        logger.debug("Joining identical in-flight LLM call")
+    # Shield so one caller being cancelled does not cancel the shared call
+    return await asyncio.shield(task)
+
+
+def get_sql_cache() -> LRUCache:
+    """Return the process-wide cache of successfully executed SQL."""
+    return _SQL_CACHE
+
+
+def get_intent_cache() -> LRUCache:
+    """Return the process-wide cache of intent classifications."""
+    return _INTENT_CACHE
+
+
+def get_vis_cache() -> LRUCache:
+    """Return the process-wide cache of chart decisions."""
+    return _VIS_CACHE
+
+
+def get_pyodide_code_cache() -> LRUCache:
+    """Return the process-wide cache of generated Pyodide analysis code."""
+    return _PYODIDE_CODE_CACHE
+
+
+def get_chart_cache() -> LRUCache:
+    """Return the process-wide cache of rendered Plotly charts."""
+    return _CHART_CACHE
+
+
+def get_schema_hash() -> bytes:
+    """
+    Return the blake2b digest of the schema info, loading it if needed.
 
-    logger.info(f"Masked {person_counter - 1} individuals")
-    return masked_rows
+    Raises:
+        SchemaLoadError: If schema file not found or invalid
+    """
+    load_schema_info()
+    return _SCHEMA_HASH
+
+
+def normalize_question(question: str) -> str:
+    """
+    Collapse whitespace in a question for use as a cache key.
+
+    Case is kept: names and values in a question ('Alice' vs 'alice') end up
+    as literals in the generated SQL or code, so they must not share a key.
+    """
+    return _WHITESPACE_RE.sub(' ', question.strip())
+
+
+def sql_cache_key(question: str, schema_hash: bytes, needs_pyodide: bool) -> Tuple[str, bytes, bool]:
+    """
+    Build the SQL cache key for a question against the current schema.
+
+    The schema hash makes regenerating schema_info.json change every key, so
+    stale SQL is never served for a different schema.
+
+    Args:
+        question: Raw user question
+        schema_hash: Digest from get_schema_hash()
+        needs_pyodide: Whether the simple (Pyodide) SQL prompt is used
+
+    Returns:
+        Hashable key for _SQL_CACHE
+    """
+    return normalize_question(question), schema_hash, bool(needs_pyodide)
+
+
+def chart_cache_key(
+    user_question: str, chart_type: str, chart_title: Optional[str], query_result: str
+) -> Tuple[str, str, Optional[str], bytes]:
+    """
+    Build the chart cache key for a chart decision over a query result.
+
+    The same decision over an identical result renders identical Plotly JSON.
+    The result is hashed so the key does not keep a large string alive; the
+    raw question is kept because the fallback title is derived from it.
+
+    Args:
+        user_question: Raw user question
+        chart_type: Chosen chart type
+        chart_title: LLM chart title, or None when the fallback title is used
+        query_result: JSON string of the (masked) SQL result
+
+    Returns:
+        Hashable key for _CHART_CACHE
+    """
+    result_hash = hashlib.blake2b(query_result.encode('utf-8'), digest_size=16).digest()
+    return user_question, chart_type, chart_title, result_hash
@@ -5,6 +5,11 @@ This module defines the core logic nodes for the SQL Agent workflow.
 Each function represents a node in the LangGraph state machine, processing
 the state and returning updates.
 
+All LLM-backed nodes are coroutines that call `ainvoke`, so the LangGraph
+runtime can overlap the network round-trips of concurrent requests instead of
+blocking a worker thread per call. execute_SQL is a coroutine too and awaits
+its query on the asyncpg-backed engine.
+
 Key Components:
 - Intent Classification: Routes between SQL generation and general conversation
 - SQL Generation: Converts natural language to PostgreSQL queries (with retries)
@@ -14,14 +19,17 @@ Key Components:
 - Response Generation: Formats final answers in natural language
 """
 
-import ast
 import os
-import json
+import asyncio
+import base64
+import functools
+import orjson
 import csv
 import io
 import re
-from typing import Optional
-from src.agent.state import SQLAgentState
+from typing import Literal, Optional
+from src.agent.state import SQLAgentState, Classification, is_error_result
+from src.agent.routing import RouteDecider
 from src.agent.prompts import (
     get_intent_classification_prompt,
     get_general_response_prompt,
@@ -45,26 +53,71 @@ from src.agent.helpers import (
     get_cached_engine,
     load_schema_info,
     apply_pii_masking,
-    SCHEMA_JSON_PATH
+    coalesced_ainvoke,
+    sql_cache_key,
+    get_schema_hash,
+    get_sql_cache,
+    get_intent_cache,
+    get_vis_cache,
+    get_pyodide_code_cache,
+    get_chart_cache,
+    chart_cache_key,
+    normalize_question,
+    get_allowed_tables,
 )
 from src.agent.config import (
-    llm_intent,
-    llm_sql,
-    llm_vis,
-    llm_response,
-    llm,
+    get_llm_intent,
+    get_llm_sql,
+    get_llm_vis,
+    get_llm_response,
+    MAX_SQL_RETRIES,
+    SQL_FETCH_BATCH_SIZE,
+    SQL_MAX_ROWS,
     VALID_CHART_TYPES
 )
-from langchain_core.messages import HumanMessage, ToolMessage, AIMessage
+from langchain_core.messages import HumanMessage, SystemMessage, ToolMessage, AIMessage
 from langchain_core.prompts import ChatPromptTemplate
 from langgraph.types import Command
-from sqlalchemy import text, Engine
+from sqlalchemy import text
 from sqlalchemy.exc import SQLAlchemyError
-import plotly.express as px
 
 # Setup logger
 logger = setup_logger('cadet.nodes')
 
+# XML-style tags the SQL and response prompts ask the LLM to answer in
+_SQL_TAG_RE = re.compile(r'<sql>(.*?)</sql>', re.DOTALL | re.IGNORECASE)
+_REASONING_TAG_RE = re.compile(r'<reasoning>(.*?)</reasoning>', re.DOTALL | re.IGNORECASE)
+_ANSWER_TAG_RE = re.compile(r'<answer>(.*?)</answer>', re.DOTALL | re.IGNORECASE)
+_INSIGHT_TAG_RE = re.compile(r'<insight>(.*?)</insight>', re.DOTALL | re.IGNORECASE)
+# Markdown code fences (with an optional language tag) wrapped around LLM output
+_CODE_FENCE_RE = re.compile(r'```(?:sql|json|python)?')
+
+# query_result values that mean the query returned nothing
+_EMPTY_RESULTS = frozenset(('[]', '', 'null'))
+
+# Appended to the answer when execute_SQL cut the result at SQL_MAX_ROWS
+_TRUNCATION_NOTE = (
+    f"⚠️ Results truncated to {SQL_MAX_ROWS:,} rows: totals, counts and rankings "
+    f"above cover only those rows."
+)
+
+# Tool messages for the frontend, validated once at import. Each result is a
+# model_copy (no pydantic re-validation) with its own content; the dict fields
+# are replaced as well so no two messages share a mutable dict
+_CHART_TOOL_MESSAGE = ToolMessage(
+    content="", tool_call_id="call_visualisation_1", name="create_plotly_chart"
+)
+_PYODIDE_TOOL_MESSAGE = ToolMessage(
+    content="", tool_call_id="call_python_interpreter", name="python_interpreter"
+)
+
+
+def _tool_message(template: ToolMessage, content: str) -> ToolMessage:
+    """Copy a tool message template with new content."""
+    return template.model_copy(
+        update={"content": content, "additional_kwargs": {}, "response_metadata": {}}
+    )
+
 
 def read_question(state: SQLAgentState) -> dict:
     """
@@ -82,7 +135,7 @@ def read_question(state: SQLAgentState) -> dict:
     Raises:
         ValidationError: If message format is invalid
 
-    Node Position: START → read_question → intent_classification
+    Node Position: START → read_question → [intent_classification, pyodide_request_classification]
     """
     messages = state.get("messages", [])
 
@@ -126,79 +179,94 @@ def read_question(state: SQLAgentState) -> dict:
         logger.error(f"Failed to extract question: {e}")
         raise ValidationError(f"Message extraction failed: {e}")
 
-def intent_classification(state: SQLAgentState) -> dict:
+async def intent_classification(
+    state: SQLAgentState,
+) -> Command[Literal["generate_SQL", "generate_general_response"]]:
     """
-    Classify user intent as 'sql' or 'general'.
+    Classify user intent as 'sql' or 'general' and detect chart requests.
 
     Determines whether the question requires database query (sql)
     or general conversation (general). This routing decision affects
-    the entire workflow path.
+    the entire workflow path. The same LLM call also reports whether the
+    user explicitly asked for a visualisation, so the visualisation node
+    can skip its own LLM call for the (common) no-chart case.
 
     Args:
         state: Current workflow state (requires user_question)
 
     Returns:
-        Dictionary with 'intent' key ('sql' or 'general')
+        Command updating 'intent' ('sql' or 'general') and
+        'needs_visualisation' (bool, or None if the model gave no verdict),
+        and routing to the matching branch
 
     Raises:
         ValidationError: If user_question is missing or invalid
 
     Node Position: read_question → intent_classification → [sql/general branch]
+        (runs in parallel with pyodide_request_classification, whose
+        needs_pyodide update has landed by the time generate_SQL starts)
     """
     user_question = state.get('user_question')
 
     if not user_question:
         raise ValidationError("Missing user_question in state")
 
-    try:
-        # Get prompt from prompts module
-        intent_prompt = get_intent_classification_prompt()
+    # Repeated questions reuse the earlier verdict (Classification is immutable)
+    intent_cache = get_intent_cache()
+    cache_key = normalize_question(user_question)
+    classification = intent_cache.get(cache_key)
 
-        prompt_template = ChatPromptTemplate.from_messages([
-            ("system", "{intent_prompt}"),
-            ("human", "{user_question}")
-        ])
+    if classification is not None:
+        logger.info(f"Intent cache hit: {classification.intent} for question: {user_question[:50]}")
+    else:
+        try:
+            # Get prompt from prompts module
+            intent_prompt = get_intent_classification_prompt()
 
-        final_prompt_value = prompt_template.invoke({
-            "intent_prompt": intent_prompt,
-            "user_question": user_question
-        })
+            prompt_template = ChatPromptTemplate.from_messages([
+                ("system", "{intent_prompt}"),
+                ("human", "{user_question}")
+            ])
 
-        response = llm_intent.invoke(final_prompt_value)  # Temperature: 0.0 (deterministic)
+            final_prompt_value = prompt_template.invoke({
+                "intent_prompt": intent_prompt,
+                "user_question": user_question
+            })
 
-        # Clean markdown formatting (remove **, `, ', etc.)
-        intent = response.content.strip().lower()
-        intent = intent.replace("*", "").replace("`", "").replace("'", "").replace('"', "").strip()
+            response = await get_llm_intent().ainvoke(final_prompt_value)  # Temperature: 0.0 (deterministic)
 
-        # Validate intent
-        if intent not in ['sql', 'general']:
-            logger.warning(f"Invalid intent '{response.content.strip()}', defaulting to 'general'")
-            intent = 'general'
+            classification = Classification.from_llm_output(response.content)
+            intent_cache.put(cache_key, classification)
 
-        logger.info(f"Intent classified: {intent} for question: {user_question[:50]}")
-        return {"intent": intent}
+            logger.info(
+                f"Intent classified: {classification.intent} "
+                f"(visualise={classification.needs_visualisation}) for question: {user_question[:50]}"
+            )
 
-    except Exception as e:
-        logger.error(f"Intent classification failed: {e}")
-        # Fallback to general intent on error
-        logger.warning("Falling back to 'general' intent due to error")
-        return {"intent": "general"}
+        except Exception as e:
+            logger.error(f"Intent classification failed: {e}")
+            # Fallback to general intent on error (not cached)
+            logger.warning("Falling back to 'general' intent due to error")
+            classification = Classification(intent="general", needs_visualisation=False)
+
+    update = classification.to_state_update()
+    return Command(update=update, goto=RouteDecider.goto_after_intent(update))
 
-def generate_general_response(state: SQLAgentState) -> dict:
+async def generate_general_response(state: SQLAgentState) -> dict:
 
     user_question = state['user_question']
 
     # Get prompt from prompts module
     general_prompt = get_general_response_prompt(user_question)
 
-    response = llm_response.invoke(general_prompt)  # Temperature: 0.7 (natural language)
+    response = await get_llm_response().ainvoke(general_prompt)  # Temperature: 0.7 (natural language)
 
     return {
         "messages": [response]
     }
 
 
-def generate_SQL(state: SQLAgentState) -> dict:
+async def generate_SQL(state: SQLAgentState) -> dict:
     """
     Generate validated PostgreSQL query from user question.
 
@@ -228,10 +296,8 @@ def generate_SQL(state: SQLAgentState) -> dict:
         # Load schema (cached after first call)
         schema_info = load_schema_info()
 
-        # Load allowed tables for validation to prevent hallucinations
-        with open(SCHEMA_JSON_PATH, 'r') as f:
-            schema_data = json.load(f)
-        allowed_tables = set(schema_data['tables'].keys())
+        # Allowed tables for validation to prevent hallucinations (cached)
+        allowed_tables = get_allowed_tables()
 
         # Check if pyodide analysis is needed
         needs_pyodide = state.get('needs_pyodide', False)
@@ -242,41 +308,60 @@ def generate_SQL(state: SQLAgentState) -> dict:
         # If pyodide is needed, use simpler SQL prompt to just fetch raw data
         if needs_pyodide:
             logger.info("Using simple SQL prompt for Pyodide analysis")
-            sql_prompt = get_simple_sql_for_pyodide_prompt(schema_info, user_question)
+            system_prompt = get_simple_sql_for_pyodide_prompt(schema_info)
         else:
             logger.info("Using complex SQL prompt for direct analysis")
-            sql_prompt = get_sql_generation_prompt(schema_info, user_question)
+            system_prompt = get_sql_generation_prompt(schema_info)
+
+        # Schema and rules go in the system message, the question (and any
+        # retry feedback) after it: every request shares the same prefix
+        sql_messages = [SystemMessage(content=system_prompt), HumanMessage(content=user_question)]
 
         # Check if this is a retry (use dedicated counter)
         retry_count = state.get('sql_retry_count', 0) or 0
+        sql_cache = get_sql_cache()
+        cache_key = sql_cache_key(user_question, get_schema_hash(), needs_pyodide)
+
+        if retry_count == 0:
+            # Same question against the same schema: reuse SQL that already ran
+            # successfully (execute_SQL stores it)
+            cached_sql = sql_cache.get(cache_key)
+            if cached_sql is not None:
+                logger.info("SQL cache hit, skipping generation")
+                return {"sql_query": cached_sql, "query_result": None}
+        else:
+            # The previous attempt failed; if it came from the cache, never
+            # serve it again
+            sql_cache.discard(cache_key)
 
-        if retry_count > 0:
             # Get previous error from query_result to generate targeted feedbacks
             previous_error = state.get('query_result', '')
 
             # Use error feedback router to get targeted guidance
-            sql_prompt += get_sql_error_feedback(previous_error, allowed_tables)
+            sql_messages.append(HumanMessage(
+                content=get_sql_error_feedback(previous_error, allowed_tables).strip()
+            ))
 
             logger.info(f"Retry {retry_count}: Added specific feedback for error type")
 
-        response = llm_sql.invoke(sql_prompt)  # Temperature: 0.1 (accurate & safe queries)
+        response = await coalesced_ainvoke(get_llm_sql(), sql_messages)  # Temperature: 0.1 (accurate & safe queries)
         raw_content = response.content.strip()
 
         # Try XML parsing first (new structured format)
-        sql_match = re.search(r'<sql>(.*?)</sql>', raw_content, re.DOTALL | re.IGNORECASE)
+        sql_match = _SQL_TAG_RE.search(raw_content)
 
         if sql_match:
             # Extract SQL from XML tags
             sql_query = sql_match.group(1).strip()
 
             # Optional: Extract reasoning for logging (not used in validation)
-            reasoning_match = re.search(r'<reasoning>(.*?)</reasoning>', raw_content, re.DOTALL | re.IGNORECASE)
+            reasoning_match = _REASONING_TAG_RE.search(raw_content)
             if reasoning_match:
                 reasoning = reasoning_match.group(1).strip()
-                logger.debug(f"LLM reasoning: {reasoning[:200]}...")
+                logger.debug("LLM reasoning: %s...", reasoning[:200])
         else:
             # Fallback to legacy parsing (markdown format)
-            sql_query = raw_content.replace("```sql", "").replace("```", "").strip()
+            sql_query = _CODE_FENCE_RE.sub("", raw_content).strip()
             logger.debug("Using fallback parsing (no XML tags found)")
 
         # CRITICAL: Validate query safety
@@ -290,7 +375,7 @@ def generate_SQL(state: SQLAgentState) -> dict:
         # Validation failed - store error in state for retry logic
         error_msg = f"Error: {str(e)}"
         logger.error(f"SQL validation failed: {e}")
-        logger.debug(f"Failed SQL query: {sql_query if 'sql_query' in locals() else 'N/A'}")
+        logger.debug("Failed SQL query: %s", sql_query if 'sql_query' in locals() else 'N/A')
 
         # Increment retry counter (NOT messages - prevents token overflow)
         current_retry = state.get('sql_retry_count', 0) or 0
@@ -305,7 +390,40 @@ def generate_SQL(state: SQLAgentState) -> dict:
         logger.error(f"SQL generation failed: {e}")
         raise
 
-def execute_SQL(state: SQLAgentState) -> dict:
+async def execute_SQL(state: SQLAgentState) -> Command[Literal[
+    "generate_SQL",
+    "visualisation_request_classification",
+    "generate_pyodide_analysis",
+]]:
+    """
+    Execute the query and route to retry, fallback or the result consumers.
+
+    Args:
+        state: Current workflow state (requires sql_query)
+
+    Returns:
+        Command with the execution update and the next node(s), as decided
+        by RouteDecider.decide_post_sql_route. On fallback the update also
+        switches to Pyodide mode so generate_SQL starts over directly.
+
+    Node Position: generate_SQL → execute_SQL → [retry/fallback/fan-out]
+    """
+    update = await _run_sql(state)
+    if update.get('query_result') and not is_error_result(update['query_result']):
+        # Only SQL that actually ran is cached: a query that validates but
+        # fails in the database must not come back for the next identical
+        # question
+        get_sql_cache().put(
+            sql_cache_key(state['user_question'], get_schema_hash(), state.get('needs_pyodide', False)),
+            state['sql_query'],
+        )
+    route = RouteDecider.decide_post_sql_route({**state, **update}, MAX_SQL_RETRIES)
+    if route == "fallback":
+        update.update(_pyodide_fallback_update(state))
+    return Command(update=update, goto=RouteDecider.post_sql_targets(route))
+
+
+async def _run_sql(state: SQLAgentState) -> dict:
     """
     Execute validated SQL query against PostgreSQL database.
 
@@ -322,7 +440,6 @@ def execute_SQL(state: SQLAgentState) -> dict:
     Raises:
         ValidationError: If sql_query missing
 
-    Node Position: generate_SQL → execute_SQL → [retry/success]
     """
     sql_query = state.get('sql_query')
     query_result = state.get('query_result')
@@ -345,16 +462,37 @@ def execute_SQL(state: SQLAgentState) -> dict:
         engine = get_cached_engine()
         logger.info(f"Executing SQL (attempt {retry_count + 1}): {sql_query[:100]}...")
 
-        with engine.connect() as conn:
-            result = conn.execute(text(sql_query))
-            rows = [dict(row._mapping) for row in result.fetchall()]
+        # Awaited on asyncpg, so concurrent requests keep their LLM calls moving
+        # while the database works. stream() + yield_per uses a server-side
+        # cursor: no driver-side buffer holds a second copy of the result,
+        # and rows past SQL_MAX_ROWS are never fetched at all
+        rows = []
+        async with engine.connect() as conn:
+            result = await conn.stream(
+                text(sql_query), execution_options={"yield_per": SQL_FETCH_BATCH_SIZE}
+            )
+            async for partition in result.mappings().partitions():
+                rows.extend(map(dict, partition))
+                if len(rows) > SQL_MAX_ROWS:
+                    break
+
+        truncated = len(rows) > SQL_MAX_ROWS
+        if truncated:
+            del rows[SQL_MAX_ROWS:]
+            logger.warning(f"Query result capped at {SQL_MAX_ROWS} rows")
 
         # Apply PII masking (deterministic, Python-only)
         masked_rows = apply_pii_masking(rows)
 
-        result_str = json.dumps(masked_rows, default=str, ensure_ascii=False)
+        # default=str covers Decimal; datetimes are passed through to it too so
+        # they keep their str() form ('2024-01-31 09:00:00') in the result
+        result_str = orjson.dumps(
+            masked_rows, default=str, option=orjson.OPT_PASSTHROUGH_DATETIME
+        ).decode()
         logger.info(f"Query succeeded: {len(masked_rows)} rows")
-        return {"query_result": result_str}
+        # The flag travels with the result so the answer and the analysis
+        # can say they only cover the first SQL_MAX_ROWS rows
+        return {"query_result": result_str, "query_truncated": truncated}
 
     except SQLAlchemyError as e:
         # Database errors (syntax, connection, data type, etc.)
@@ -374,7 +512,7 @@ def execute_SQL(state: SQLAgentState) -> dict:
             "sql_retry_count": retry_count + 1
         }
 
-def visualisation_request_classification(state: SQLAgentState) -> dict:
+async def visualisation_request_classification(state: SQLAgentState) -> dict:
     """
     Determine if a chart is needed and select the appropriate type.
 
@@ -397,123 +535,283 @@ def visualisation_request_classification(state: SQLAgentState) -> dict:
         logger.info("Skipping visualisation (non-SQL or error)")
         return {"plotly_data": None}
 
-    if sql_result in ['[]', '', 'null']:
+    if sql_result in _EMPTY_RESULTS:
         logger.info("Skipping visualisation (empty result)")
         return {"plotly_data": None}
 
+    # Fused intent call already decided the user did not ask for a chart
+    if state.get('needs_visualisation') is False:
+        logger.info("Skipping visualisation (not requested)")
+        return {"plotly_data": None}
+
+    rows = _get_query_rows(state)
+
+    # Chart suitability depends on the question and the result's shape, so a
+    # repeated question returning the same columns reuses the earlier decision
+    vis_cache = get_vis_cache()
+    columns = tuple(rows[0]) if rows and isinstance(rows[0], dict) else ()
+    cache_key = (normalize_question(user_question), columns)
+    cached = vis_cache.get(cache_key)
+
     try:
+        if cached is not None:
+            logger.info("Chart decision cache hit")
+            chart_type, chart_title = cached
+        else:
+            chart_type, chart_title = await _decide_chart(
+                user_question, sql_result, rows, state.get('needs_visualisation')
+            )
+            if chart_type is None:
+                vis_cache.put(cache_key, (None, None))
+
+        if chart_type is None:
+            return {"plotly_data": None}
+
+        # A known decision over an identical result renders the same chart
+        chart_cache = get_chart_cache()
+        plotly_data = None
+        if cached is not None:
+            plotly_data = chart_cache.get(
+                chart_cache_key(user_question, chart_type, chart_title, sql_result)
+            )
+
+        if plotly_data is None:
+            # The rows are already PII-masked by execute_SQL node. The figure
+            # is built off the event loop; if the decision brought no title,
+            # the title call runs alongside it (only the chart type feeds it)
+            try:
+                if chart_title is None:
+                    fig, chart_title = await asyncio.gather(
+                        asyncio.to_thread(_build_chart_figure, rows, chart_type),
+                        _generate_chart_title(user_question, chart_type),
+                    )
+                else:
+                    fig = await asyncio.to_thread(_build_chart_figure, rows, chart_type)
+
+                if fig is None:
+                    return {"plotly_data": None}
+
+                plotly_data = _chart_to_json(
+                    fig, _resolve_chart_title(chart_title, user_question, rows[0])
+                )
+            except Exception as e:
+                # The chart is an extra: a result plotly cannot draw leaves
+                # the text answer without one instead of failing the run
+                logger.warning(f"Failed to build {chart_type} chart: {e}", exc_info=True)
+                return {"plotly_data": None}
+
+            # A failed title call falls back to a rule-based title; retry it next time
+            if cached is None and chart_title is not None:
+                vis_cache.put(cache_key, (chart_type, chart_title))
+
+            chart_cache.put(
+                chart_cache_key(user_question, chart_type, chart_title, sql_result), plotly_data
+            )
+        else:
+            logger.info("Chart cache hit")
+
+        tool_message = _tool_message(_CHART_TOOL_MESSAGE, plotly_data)
+
+        logger.info(f"Chart created: {chart_type}")
+        return {"messages": [tool_message], "plotly_data": plotly_data}
+
+    except orjson.JSONDecodeError:
+        logger.warning("Failed to parse LLM response as JSON")
+        return {"plotly_data": None}
+
+# The visualisation prompt only says "yes" for explicit chart keywords, so
+# clear-cut questions are decided here without the LLM round-trip
+_CHART_KEYWORD_RE = re.compile(r'chart|graph|plot|visuali[sz]|draw', re.IGNORECASE)
+_CHART_TYPE_RE = re.compile(r'\b(bar|line|pie|scatter|area)[ -]?(?:chart|graph|plot)', re.IGNORECASE)
+_CHART_NEGATION_RE = re.compile(r"\b(?:don'?t|do not|no|not|without)\b", re.IGNORECASE)
+
+
+async def _decide_chart(
+    user_question: str, sql_result: str, rows: Optional[list], needs_visualisation: Optional[bool]
+) -> tuple:
+    """
+    Decide whether to chart the result, with which chart type and title.
+
+    The LLM is only asked when the question is ambiguous: no chart keyword
+    means no chart, and an explicitly named chart type ("pie chart") is used
+    as-is unless the question also contains a negation or the result does
+    not have a plottable shape (see _is_chartable); the LLM, which sees the
+    data, judges those. When the LLM is asked, the same answer carries the
+    title.
+
+    Returns:
+        (chart_type, chart_title): chart_type is None when no chart is wanted;
+        chart_title is None when it still has to be generated
+
+    Raises:
+        orjson.JSONDecodeError: If the decision is not valid JSON
+    """
+    # needs_visualisation=True means the intent call saw a request we may not match
+    if needs_visualisation is None and not _CHART_KEYWORD_RE.search(user_question):
+        logger.info("No chart keyword in question, skipping visualisation")
+        return None, None
+
+    chart_title = None
+    explicit_type = None
+    if not _CHART_NEGATION_RE.search(user_question):
+        explicit_type = _CHART_TYPE_RE.search(user_question)
+
+    if explicit_type and not _is_chartable(rows):
+        logger.info("Chart type named in question, but the result is not plottable; asking the LLM")
+        explicit_type = None
+
+    if explicit_type:
+        chart_type = explicit_type.group(1).lower()
+        logger.info(f"Chart type named in question: {chart_type}")
+    else:
         # Get prompt from prompts module
         vis_prompt = get_visualization_prompt(user_question, sql_result)
 
-        response = llm_vis.invoke(vis_prompt)  # Temperature: 0.2 (consistent decisions)
+        response = await get_llm_vis().ainvoke(vis_prompt)  # Temperature: 0.0 (strict decisions)
 
         # Clean markdown formatting (similar to SQL generation)
         content = response.content.strip()
-        content = content.replace("```json", "").replace("```", "").strip()
+        content = _CODE_FENCE_RE.sub("", content).strip()
 
-        response_json = json.loads(content)
+        response_json = orjson.loads(content)
 
         if response_json.get('visualise') != 'yes':
-            return {"plotly_data": None}
+            return None, None
 
         chart_type = response_json.get('chart_type', 'bar')
         if chart_type not in VALID_CHART_TYPES:
             logger.warning(f"Invalid chart type '{chart_type}', using 'bar'")
             chart_type = 'bar'
 
-        # Generate chart title using LLM (token-optimized)
-        chart_title = None
-        try:
-            title_prompt = get_chart_title_prompt(user_question, chart_type)
-            title_response = llm_vis.invoke(title_prompt)
-            chart_title = title_response.content.strip()
-            
-            # Validate title length
-            if len(chart_title) > 60:
-                logger.warning(f"Chart title too long ({len(chart_title)} chars), truncating")
-                chart_title = chart_title[:57] + "..."
-            
-            logger.info(f"Generated chart title: {chart_title}")
-        except Exception as e:
-            # Fallback to rule-based title generation if LLM fails
-            logger.warning(f"Failed to generate chart title via LLM: {e}, using fallback")
-            chart_title = None
+        title = response_json.get('title')
+        if isinstance(title, str) and title.strip():
+            chart_title = _clean_chart_title(title)
 
-        # sql_result is already PII-masked by execute_SQL node
-        plotly_data = create_plotly_chart(sql_result, chart_type, title=chart_title, user_question=user_question)
+    return chart_type, chart_title
 
-        if plotly_data is None:
-            return {"plotly_data": None}
 
-        tool_message = ToolMessage(
-            content=plotly_data,
-            tool_call_id="call_visualisation_1",
-            name="create_plotly_chart"
-        )
+def _clean_chart_title(chart_title: str) -> str:
+    """Strip an LLM chart title and cap it at 60 characters."""
+    chart_title = chart_title.strip()
 
-        logger.info(f"Chart created: {chart_type}")
-        return {"messages": [tool_message], "plotly_data": plotly_data}
+    # Validate title length
+    if len(chart_title) > 60:
+        logger.warning(f"Chart title too long ({len(chart_title)} chars), truncating")
+        chart_title = chart_title[:57] + "..."
+
+    logger.info(f"Generated chart title: {chart_title}")
+    return chart_title
 
-    except json.JSONDecodeError:
-        logger.warning("Failed to parse LLM response as JSON")
-        return {"plotly_data": None}
 
-def create_plotly_chart(sql_result, chart_type, title=None, user_question=""):
+async def _generate_chart_title(user_question: str, chart_type: str) -> Optional[str]:
     """
-    Generate Plotly chart JSON from SQL results with proper titles and labels.
-    
-    Args:
-        sql_result: JSON string of SQL query results
-        chart_type: Type of chart ('bar', 'line', 'pie', 'scatter', 'area')
-        title: Pre-generated chart title (from LLM). If None, generates from user_question
-        user_question: User's original question (fallback for title generation)
-        
+    Ask the LLM for a short chart title.
+
     Returns:
-        JSON string with Plotly chart specification
+        The title (at most 60 characters), or None when the call failed and
+        the rule-based fallback title should be used
     """
+    # Generate chart title using LLM (token-optimized)
     try:
-        sql_list = json.loads(sql_result)
-    except json.JSONDecodeError:
-        try:
-            sql_list = ast.literal_eval(sql_result)
-        except (ValueError, SyntaxError) as e:
-            logger.warning(f"Failed to parse SQL result for charting: {e}")
-            return None
+        title_prompt = get_chart_title_prompt(user_question, chart_type)
+        title_response = await get_llm_vis().ainvoke(title_prompt)
+        chart_title = _clean_chart_title(title_response.content)
+    except Exception as e:
+        # Fallback to rule-based title generation if LLM fails
+        logger.warning(f"Failed to generate chart title via LLM: {e}, using fallback")
+        chart_title = None
 
-    if not sql_list:
+    return chart_title
+
+
+def _get_query_rows(state: SQLAgentState) -> Optional[list]:
+    """Return the parsed SQL result rows, or None for an error or non-JSON result."""
+    query_result = state.get('query_result')
+    if not query_result or is_error_result(query_result):
         return None
+    return _decode_query_result(query_result)
 
-    # Extract column names from first row
-    first_row = sql_list[0]
-    if isinstance(first_row, dict):
-        columns = list(first_row.keys())
-    else:
-        columns = []
 
-    # Determine axis labels from column names
+# The chart, Pyodide and response nodes all read the same query_result
+# string, so it is decoded once and the rows are shared (read-only) rather
+# than kept in state a second time
+@functools.lru_cache(maxsize=8)
+def _decode_query_result(query_result: str) -> Optional[list]:
+    """Decode a successful query_result JSON string."""
+    try:
+        return orjson.loads(query_result)
+    except orjson.JSONDecodeError:
+        return None
+
+
+# Request phrasing stripped from the question when it doubles as a chart title
+_TITLE_FILLER_RE = re.compile(
+    r'show me|create a (?:bar )?chart|visuali[sz]e|make a graph', re.IGNORECASE
+)
+_SENTENCE_END_RE = re.compile(r'[.?]')
+
+
+def _to_number(value) -> float:
+    """Coerce a chart value to float, accepting thousands separators ('1,200')."""
+    if type(value) in (int, float):
+        return float(value)
+    if value is None or isinstance(value, bool):
+        raise TypeError(f"Not a numeric chart value: {value!r}")
+    return float(str(value).replace(',', ''))
+
+
+def _is_chartable(rows: Optional[list]) -> bool:
+    """
+    Check the result has the shape _build_chart_figure plots.
+
+    That is at least two columns, a first (category) column without NULLs and
+    a last column that is numeric in every row. A one-row text result, for
+    example, would otherwise render an empty or meaningless figure.
+    """
+    if not rows or not isinstance(rows[0], dict) or len(rows[0]) < 2:
+        return False
+    try:
+        for row in rows:
+            category, *_, value = row.values()
+            if category is None:
+                return False
+            _to_number(value)
+    except (ValueError, TypeError):
+        return False
+    return True
+
+
+def _chart_labels(first_row) -> tuple:
+    """Return the (x, y) axis labels: the first and last result columns."""
+    columns = list(first_row.keys()) if isinstance(first_row, dict) else []
     x_label = columns[0] if len(columns) >= 1 else "Category"
     y_label = columns[-1] if len(columns) >= 1 else "Value"
+    return x_label, y_label
+
 
+def _resolve_chart_title(title, user_question, first_row) -> str:
+    """
+    Pick the chart title: the LLM title, else one derived from the question.
+
+    Args:
+        title: Pre-generated chart title (from LLM), or None
+        user_question: User's original question (fallback for title generation)
+        first_row: First result row, for the generic column-based title
+
+    Returns:
+        Chart title
+    """
     # Use LLM-generated title if available, otherwise fallback to extraction
     if title:
         # LLM-generated title (already clean and professional)
-        logger.debug(f"Using LLM-generated title: {title}")
+        logger.debug("Using LLM-generated title: %s", title)
     elif user_question:
         # Fallback: Extract from user question (rule-based)
         logger.debug("Using fallback title generation from user_question")
-        title = user_question.replace("show me", "").replace("Show me", "")
-        title = title.replace("create a chart", "").replace("Create a chart", "")
-        title = title.replace("create a bar chart", "").replace("Create a bar chart", "")
-        title = title.replace("visualise", "").replace("Visualise", "")
-        title = title.replace("visualize", "").replace("Visualize", "")
-        title = title.replace("make a graph", "").replace("Make a graph", "")
-        title = title.strip()
+        title = _TITLE_FILLER_RE.sub('', user_question).strip()
 
         # Take only first sentence (up to . or ?)
-        if '.' in title:
-            title = title.split('.')[0]
-        if '?' in title:
-            title = title.split('?')[0]
+        title = _SENTENCE_END_RE.split(title, maxsplit=1)[0]
 
         # Remove "showing" or "of" at the start
         if title.lower().startswith("showing "):
@@ -530,42 +828,62 @@ def create_plotly_chart(sql_result, chart_type, title=None, user_question=""):
             title = title[0].upper() + title[1:]
     else:
         # Last fallback: generic title from column names
+        x_label, y_label = _chart_labels(first_row)
         title = f"{y_label} by {x_label}"
-        logger.debug(f"Using generic title: {title}")
+        logger.debug("Using generic title: %s", title)
+
+    return title
+
+
+def _build_chart_figure(sql_list, chart_type):
+    """
+    Build the Plotly figure for SQL results, without its title.
+
+    Kept free of I/O so it can run in a worker thread while the chart title
+    is still being generated.
+
+    Args:
+        sql_list: Parsed SQL query results (list of row dicts)
+        chart_type: Type of chart ('bar', 'line', 'pie', 'scatter', 'area')
+
+    Returns:
+        plotly Figure, or None for an empty result
+    """
+    if not sql_list:
+        return None
+
+    # Determine axis labels from column names
+    x_label, y_label = _chart_labels(sql_list[0])
 
     x_data = []
     y_data = []
 
     for data in sql_list:
         if isinstance(data, dict):
-            row_values = list(data.values())
-        elif isinstance(data, (list, tuple)):
-            row_values = list(data)
+            *x_parts, y_value = data.values()
+        elif isinstance(data, (list, tuple)) and data:
+            *x_parts, y_value = data
         else:
             continue
 
-        x_string_parts = [str(x) for x in row_values[:-1]]
-
-        if x_string_parts:
-            x_value = ' '.join(x_string_parts)
-        else:
-            x_value = str(row_values[0])
-
-        y_value = row_values[-1]
-
-        x_data.append(x_value)
+        # All but the last column label the point; a single column labels itself
+        x_data.append(' '.join(map(str, x_parts)) if x_parts else str(y_value))
         y_data.append(y_value)
 
     # Try to convert y_data to numbers if they are strings representing numbers
+    # (e.g. NUMERIC columns, serialised as strings). Values that are already
+    # int/float skip the str() round-trip.
     try:
-        # Check if all values can be converted to float
-        numeric_y_data = [float(str(y).replace(',', '')) for y in y_data if y is not None]
-        if len(numeric_y_data) == len(y_data):
-            y_data = numeric_y_data
+        y_data = [_to_number(y) for y in y_data]
     except (ValueError, TypeError):
-        # Keep as is if conversion fails
+        # Keep as is if any value (including NULL) is not numeric
         pass
 
+    # Imported on first use: plotly.express pulls in pandas and the full
+    # graph_objects tree, which conversational and Pyodide-only processes
+    # never need. Later calls are a sys.modules lookup
+    import plotly.express as px
+
     # Chart generation with layout customization
     if chart_type == "bar":
         fig = px.bar(x=x_data, y=y_data, text=y_data)
@@ -613,7 +931,6 @@ def create_plotly_chart(sql_result, chart_type, title=None, user_question=""):
     # Apply common layout settings to all chart types
     fig.update_layout(
         title={
-            'text': title,
             'x': 0.5,
             'xanchor': 'center'
         },
@@ -622,11 +939,47 @@ def create_plotly_chart(sql_result, chart_type, title=None, user_question=""):
         margin=dict(l=50, r=50, t=80, b=50)
     )
 
-    return json.dumps({
-        "type": "plotly",
-        "data": json.loads(fig.to_json())['data'],
-        "layout": json.loads(fig.to_json())['layout']
-    })
+    return fig
+
+
+def _plotly_json_default(value):
+    """orjson fallback for what OPT_SERIALIZE_NUMPY does not cover (object-dtype arrays)."""
+    if hasattr(value, 'tolist'):
+        return value.tolist()
+    raise TypeError(f"Type is not JSON serializable: {type(value).__name__}")
+
+
+def _chart_to_json(fig, title: str) -> str:
+    """Set the chart title and serialise the figure for the frontend."""
+    fig.update_layout(title_text=title)
+    # to_plotly_json() is the {"data": ..., "layout": ...} dict itself, so the
+    # figure is serialised once, by orjson, with the type tag the frontend
+    # checks for. Numeric arrays are written natively; object-dtype arrays
+    # (category labels) go through the default hook
+    return orjson.dumps(
+        {"type": "plotly", **fig.to_plotly_json()},
+        default=_plotly_json_default,
+        option=orjson.OPT_SERIALIZE_NUMPY,
+    ).decode()
+
+
+# Only trigger for advanced statistical analysis that SQL cannot handle
+PYODIDE_KEYWORDS = (
+    'correlation',
+    'statistical analysis',
+    'standard deviation',
+    'variance',
+    'distribution',  # Covers "distribution analysis", "price distribution", etc.
+    'skewness',
+    'kurtosis',
+    'outlier',  # Also covers "outliers"
+    'percentile',
+    'quartile',
+    'time series'  # Covers "time series analysis"
+)
+# One case-insensitive pass over the question instead of lower() + a scan per keyword
+_PYODIDE_KEYWORDS_RE = re.compile('|'.join(map(re.escape, PYODIDE_KEYWORDS)), re.IGNORECASE)
+
 
 def pyodide_request_classification(state: SQLAgentState) -> dict:
 
@@ -635,117 +988,124 @@ def pyodide_request_classification(state: SQLAgentState) -> dict:
     # Safety check: ensure user_question is a string
     if not user_question or not isinstance(user_question, str):
         logger.warning("Pyodide classification: invalid user_question")
-        return {
-            "needs_pyodide": False
-        }
+        return {"needs_pyodide": False}
 
-    # Only trigger for advanced statistical analysis that SQL cannot handle
-    pyodide_keywords = [
-        'correlation',
-        'statistical analysis',
-        'standard deviation',
-        'variance',
-        'distribution',  # Covers "distribution analysis", "price distribution", etc.
-        'skewness',
-        'kurtosis',
-        'outlier',
-        'outliers',
-        'percentile',
-        'quartile',
-        'time series'  # Covers "time series analysis"
-    ]
-
-    needs_pyodide = any(keyword in user_question.lower() for keyword in pyodide_keywords)
+    needs_pyodide = _PYODIDE_KEYWORDS_RE.search(user_question) is not None
 
     logger.info(f"Pyodide classification: needs_pyodide={needs_pyodide} for question: {user_question[:50]}...")
 
-    return {
-        "needs_pyodide": needs_pyodide
-    }
+    return {"needs_pyodide": needs_pyodide}
+
+
+# Code sent to the browser: decodes the base64 CSV payload into `csv_data`
+# (the name the analysis prompt promises), then runs the generated code
+_PYODIDE_CODE_TEMPLATE = """import pandas as pd
+import io
+import base64
+
+# Injected data (CSV format)
+csv_data = base64.b64decode("%s").decode('utf-8')
+
+# Analysis Code
+%s"""
 
 
-def generate_pyodide_analysis(state: SQLAgentState) -> dict:
+async def generate_pyodide_analysis(state: SQLAgentState) -> dict:
+    """
+    Generate the pandas code that analyses the query result in the browser.
+
+    Runs in parallel with visualisation_request_classification. The code is
+    stored in state rather than sent as a message: generate_response emits it
+    after the chart and before the answer, keeping the thread order fixed.
 
+    Args:
+        state: Current workflow state (requires user_question, query_result)
+
+    Returns:
+        Dictionary with 'pyodide_code' (None when there is nothing to analyse)
+
+    Node Position: execute_SQL → generate_pyodide_analysis → generate_response
+    """
     user_question = state['user_question']
     sql_result = state['query_result']
 
     # Safety check: ensure sql_result is valid
     if not sql_result or not isinstance(sql_result, str):
-        return {}
+        return {"pyodide_code": None}
 
-    if "Error:" in sql_result or sql_result in ["[]", ""]:
-        return {}
+    if "Error:" in sql_result or sql_result in _EMPTY_RESULTS:
+        return {"pyodide_code": None}
 
     # Extract schema (first row) to show LLM the structure without full data
-    try:
-        data_list = json.loads(sql_result)
-        if data_list and len(data_list) > 0:
-            # Pass only the first row as sample to keep prompt light and data-agnostic
-            data_sample = json.dumps([data_list[0]])
-            
-            # Convert to CSV for efficient injection
-            output = io.StringIO()
-            if isinstance(data_list[0], dict):
-                keys = data_list[0].keys()
-                writer = csv.DictWriter(output, fieldnames=keys)
-                writer.writeheader()
-                # Handle None values as empty strings
-                for row in data_list:
-                    clean_row = {k: (v if v is not None else "") for k, v in row.items()}
-                    writer.writerow(clean_row)
-            csv_data = output.getvalue()
-        else:
-            data_sample = "[]"
-            csv_data = ""
-    except json.JSONDecodeError:
-        return {}
+    data_list = _get_query_rows(state)
+    if data_list is None:
+        return {"pyodide_code": None}
+
+    # The text is encoded to UTF-8 as it is written, so no intermediate CSV
+    # str (and no getvalue()/encode() copies of it) is built before base64
+    csv_bytes = io.BytesIO()
+    if data_list and len(data_list) > 0:
+        # Pass only the first row as sample to keep prompt light and data-agnostic
+        data_sample = orjson.dumps([data_list[0]]).decode()
+
+        # Convert to CSV for efficient injection
+        if isinstance(data_list[0], dict):
+            csv_text = io.TextIOWrapper(csv_bytes, encoding='utf-8', newline='')
+            # SQL rows share one column order, so values can be written
+            # positionally; csv writes None as an empty string by itself
+            writer = csv.writer(csv_text)
+            writer.writerow(data_list[0].keys())
+            writer.writerows(row.values() for row in data_list)
+            csv_text.detach()  # Flush, leaving csv_bytes open
+    else:
+        data_sample = "[]"
+
+    # The prompt forbids hardcoded values, so the code depends only on the
+    # question, the columns and whether the rows were capped: a repeat over
+    # fresh rows reuses it
+    code_cache = get_pyodide_code_cache()
+    columns = tuple(data_list[0]) if data_list and isinstance(data_list[0], dict) else ()
+    truncated_to = SQL_MAX_ROWS if state.get('query_truncated') else None
+    cache_key = (normalize_question(user_question), columns, truncated_to)
+    generated_code = code_cache.get(cache_key)
+
+    if generated_code is not None:
+        logger.info("Pyodide code cache hit")
+    else:
+        # Get prompt from prompts module (passing sample only)
+        pyodide_prompt = get_pyodide_analysis_prompt(user_question, data_sample, truncated_to)
 
-    # Get prompt from prompts module (passing sample only)
-    pyodide_prompt = get_pyodide_analysis_prompt(user_question, data_sample)
+        response = await get_llm_sql().ainvoke(pyodide_prompt)  # Temperature: 0.1
+        generated_code = _CODE_FENCE_RE.sub("", response.content).strip()
+        code_cache.put(cache_key, generated_code)
 
-    response = llm_sql.invoke(pyodide_prompt)  # Temperature: 0.1
-    generated_code = response.content.replace("```python", "").replace("```", "").strip()
+    # Inject the CSV data into the code dynamically. Base64 output needs no
+    # escaping, so the payload is embedded as a plain literal instead of
+    # being run through repr() (a per-character escape pass and extra copy)
+    payload = base64.b64encode(csv_bytes.getbuffer()).decode('ascii')
+    final_code = _PYODIDE_CODE_TEMPLATE % (payload, generated_code)
 
-    # Inject the CSV data into the code dynamically
-    final_code = f"""import pandas as pd
-import io
+    return {"pyodide_code": final_code}
 
-# Injected data (CSV format)
-csv_data = {repr(csv_data)}
 
-# Analysis Code
-{generated_code}"""
-    
-    tool_message = ToolMessage(
-        content=final_code,
-        tool_call_id="call_python_interpreter",
-        name="python_interpreter"
-    )
-    
-    return {
-        "messages": [tool_message]
-    }
+def _pyodide_fallback_update(state: SQLAgentState) -> dict:
+    """
+    Build the state update that enables Pyodide fallback mode.
 
+    Merged into execute_SQL's Command when SQL generation/execution has failed
+    3 times. It resets the error state and forces simple SQL generation for
+    Pyodide analysis.
 
-def enable_pyodide_fallback(state: SQLAgentState) -> dict:
-    """
-    Enable Pyodide fallback mode after complex SQL failures.
-    
-    This node is triggered when SQL generation/execution fails 3 times.
-    It resets the error state and forces simple SQL generation for Pyodide analysis.
-    
     Args:
         state: Current workflow state
-        
+
     Returns:
         Dictionary with needs_pyodide=True, fallback flag, reset counter, and cleared error
-        
-    Node Position: execute_SQL[3x failure] → enable_pyodide_fallback → generate_SQL
     """
     user_question = state.get('user_question', '')
     logger.warning(f"Enabling Pyodide fallback for question: {user_question[:50]}...")
     logger.info("Complex SQL failed 3 times. Switching to simple SQL + Pyodide analysis.")
-    
+
     return {
         "needs_pyodide": True,
         "pyodide_fallback_attempted": True,
@@ -755,8 +1115,27 @@ def enable_pyodide_fallback(state: SQLAgentState) -> dict:
     }
 
 
-def generate_response(state: SQLAgentState) -> dict:
-    """Generate natural language response from SQL results"""
+async def generate_response(state: SQLAgentState) -> dict:
+    """
+    Generate natural language response from SQL results.
+
+    Joins the chart and Pyodide branches. The chart message was added by
+    visualisation_request_classification; the Pyodide code (generated in
+    parallel with it) is emitted here, so the thread always reads chart,
+    Python analysis, answer.
+
+    Node Position: [visualisation_request_classification, generate_pyodide_analysis] → generate_response → END
+    """
+    update = await _draft_response(state)
+
+    pyodide_code = state.get('pyodide_code') if state.get('needs_pyodide') else None
+    if pyodide_code:
+        update["messages"] = [_tool_message(_PYODIDE_TOOL_MESSAGE, pyodide_code), *update["messages"]]
+    return update
+
+
+async def _draft_response(state: SQLAgentState) -> dict:
+    """Write the answer message for generate_response."""
     question = state.get('user_question', '')
     result = state.get('query_result', '')
 
@@ -768,7 +1147,7 @@ def generate_response(state: SQLAgentState) -> dict:
         )]}
 
     # Handle empty results
-    if result in ['[]', '', 'null']:
+    if result in _EMPTY_RESULTS:
         logger.info("Empty result, notifying user")
         return {"messages": [HumanMessage(
             content="No data found for your question. Please try a different query."
@@ -779,43 +1158,47 @@ def generate_response(state: SQLAgentState) -> dict:
 
     # When Pyodide is performing analysis, send metadata instead of truncated data
     if needs_pyodide:
-        try:
-            data_list = json.loads(result)
-            if data_list and len(data_list) > 0:
-                # Create metadata summary instead of sending truncated raw data
-                metadata = {
-                    "row_count": len(data_list),
-                    "columns": list(data_list[0].keys()) if isinstance(data_list[0], dict) else [],
-                    "sample_rows": data_list[:2]  # Only first 2 rows as structure example
-                }
-                result_for_prompt = json.dumps(metadata, indent=2)
-                logger.info(f"Pyodide mode: Sending metadata ({len(data_list)} rows) instead of full data")
-            else:
-                result_for_prompt = result
-        except (json.JSONDecodeError, KeyError, IndexError):
+        data_list = _get_query_rows(state)
+        if data_list and len(data_list) > 0:
+            # Create metadata summary instead of sending truncated raw data
+            metadata = {
+                "row_count": len(data_list),
+                "columns": list(data_list[0].keys()) if isinstance(data_list[0], dict) else [],
+                "sample_rows": data_list[:2]  # Only first 2 rows as structure example
+            }
+            result_for_prompt = orjson.dumps(metadata, option=orjson.OPT_INDENT_2).decode()
+            logger.info(f"Pyodide mode: Sending metadata ({len(data_list)} rows) instead of full data")
+        else:
             result_for_prompt = result
     else:
         result_for_prompt = result
 
-    response_prompt = get_response_generation_prompt(question, result_for_prompt, needs_pyodide)
+    truncated = bool(state.get('query_truncated'))
+    response_prompt = get_response_generation_prompt(
+        question, result_for_prompt, needs_pyodide, SQL_MAX_ROWS if truncated else None
+    )
 
-    response = llm_response.invoke(response_prompt)  # Temperature: 0.7 (natural & varied)
+    response = await get_llm_response().ainvoke(response_prompt)  # Temperature: 0.7 (natural & varied)
     raw_content = response.content.strip()
 
-    # Try XML parsing first (new structured format)
-    answer_match = re.search(r'<answer>(.*?)</answer>', raw_content, re.DOTALL | re.IGNORECASE)
-    insight_match = re.search(r'<insight>(.*?)</insight>', raw_content, re.DOTALL | re.IGNORECASE)
+    # Try XML parsing first (new structured format). A substring test on the
+    # lower-cased text (the tags match case-insensitively) skips the DOTALL
+    # regex scans when a tag is absent, as in legacy-format replies
+    lowered = raw_content.lower()
+    answer_match = _ANSWER_TAG_RE.search(raw_content) if '<answer>' in lowered else None
 
     if answer_match:
         # Extract structured response
-        answer_text = answer_match.group(1).strip()
-        insight_text = insight_match.group(1).strip() if insight_match else ""
+        parts = [answer_match.group(1).strip()]
+        insight_match = _INSIGHT_TAG_RE.search(raw_content) if '<insight>' in lowered else None
+        if insight_match:
+            parts.append(insight_match.group(1).strip())
 
-        # Combine answer and insight
-        if insight_text:
-            final_response = f"{answer_text}\n\n{insight_text}"
-        else:
-            final_response = answer_text
+        if truncated:
+            parts.append(_TRUNCATION_NOTE)
+
+        # Combine answer and insight, skipping an empty insight
+        final_response = "\n\n".join(filter(None, parts))
 
         logger.info("Response generated successfully (XML format)")
         # Create new message with parsed content
@@ -823,4 +1206,6 @@ def generate_response(state: SQLAgentState) -> dict:
     else:
         # Fallback to legacy format (use response as-is)
         logger.info("Response generated successfully (legacy format)")
+        if truncated:
+            return {"messages": [AIMessage(content=f"{raw_content}\n\n{_TRUNCATION_NOTE}")]}
         return {"messages": [response]}
\ No newline at end of file
@@ -6,26 +6,34 @@ This module contains prompts for:
 - Performing advanced data analysis in Pyodide
 """
 
+from typing import Optional
 
-def get_pyodide_analysis_prompt(user_question: str, data_sample: str) -> str:
+
+def get_pyodide_analysis_prompt(user_question: str, data_sample: str, truncated_to: Optional[int] = None) -> str:
     """
     Generate prompt for Pyodide-based Python analysis.
 
     Args:
         user_question: The user's question requesting analysis
         data_sample: JSON string showing ONE row of data to understand structure (NOT the full dataset)
+        truncated_to: Row cap the dataset was cut at, or None if it is complete
 
     Returns:
         Formatted prompt string
     """
-    return f"""You are a Python Data Analyst using pandas in a browser environment (Pyodide).
+    truncation_note = ""
+    if truncated_to is not None:
+        truncation_note = f"""
+Dataset Note: The query result was truncated to the first {truncated_to:,} rows.
+Your code MUST first print: "Note: results truncated to {truncated_to:,} rows; figures below cover only these rows."
 
-User Question: "{user_question}"
+"""
 
-Data Structure (Sample Row):
-{data_sample}
+    # Fixed instructions first, request-specific data last: identical prefixes
+    # let the inference server reuse its prefix (KV) cache across requests
+    return f"""You are a Python Data Analyst using pandas in a browser environment (Pyodide).
 
-Generate Python code to analyse this data. CRITICAL RULES:
+Generate Python code to analyse the data described at the end. CRITICAL RULES:
 
 1. **Dynamic Data Loading**:
    - The full dataset is ALREADY loaded in a string variable named `csv_data` (CSV format).
@@ -43,7 +51,7 @@ Generate Python code to analyse this data. CRITICAL RULES:
    - Example: `if df['col'].notna().any(): ...`
 
 4. **Use Actual Columns Only (CRITICAL)**:
-   - CHECK the "Data Structure" above carefully.
+   - CHECK the "Data Structure" below carefully.
    - If the data is ALREADY aggregated (contains 'mean', 'count', 'std_dev'), DO NOT try to aggregate it again.
    - Just print/format the existing data nicely.
    - ❌ BAD: `df.groupby('size')['value'].mean()` (when 'mean' column already exists)
@@ -59,5 +67,10 @@ Generate Python code to analyse this data. CRITICAL RULES:
    - Do NOT use matplotlib or plotting libraries - text output only.
    - Import pandas as pd.
 
+User Question: "{user_question}"
+
+Data Structure (Sample Row):
+{data_sample}
+{truncation_note}
 Return ONLY executable Python code below. NO markdown, NO explanations:
 """
@@ -9,35 +9,46 @@ This module contains prompts for:
 
 def get_intent_classification_prompt() -> str:
     """
-    Generate prompt for classifying user intent (sql vs general) with reasoning.
+    Generate prompt for classifying user intent (sql vs general) and whether
+    the user explicitly asked for a chart, in a single LLM call.
 
     Returns:
-        Prompt string for intent classification
+        Prompt string for fused question classification
     """
     return """You are an intent classifier for a database query assistant. Analyze the user's input carefully.
 
-**Classification Task:** Determine if the user wants to query data (sql) or have general conversation (general).
+**Classification Task:**
+1. Determine if the user wants to query data (sql) or have general conversation (general).
+2. Determine if the user EXPLICITLY asks for a visualisation (yes or no).
 
-**Decision Process:**
+**Intent Decision Process:**
 1. Check if the input is a greeting or meta-question about the system itself → general
 2. Check if the input requests data, statistics, analysis, or visualisation → sql
 3. When in doubt, default to sql (users mainly want data queries)
 
+**Visualisation Decision (DEFAULT = no):**
+- "yes" ONLY if the input contains explicit keywords: "chart", "graph", "plot", "visualise", "visualisation", "visualize", "visualization", "draw"
+- "no" for trends, comparisons or distributions WITHOUT those keywords
+- "no" if the user says NOT to visualise, or if intent is general
+
 **Examples:**
-"Show me top 10 records" → sql
-"What is the total count?" → sql
-"Which item has the highest value?" → sql
-"Create a chart" → sql
-"Compare A and B" → sql
-"Hello" → general
-"What can you do?" → general
+"Show me top 10 records" → {"intent": "sql", "visualise": "no"}
+"What is the total count?" → {"intent": "sql", "visualise": "no"}
+"Which item has the highest value?" → {"intent": "sql", "visualise": "no"}
+"Create a chart" → {"intent": "sql", "visualise": "yes"}
+"Compare A and B" → {"intent": "sql", "visualise": "no"}
+"Don't make a chart, just show the numbers" → {"intent": "sql", "visualise": "no"}
+"Hello" → {"intent": "general", "visualise": "no"}
+"What can you do?" → {"intent": "general", "visualise": "no"}
 
 **Rules:**
 - Data/numbers/rankings/comparisons/trends/charts → sql
 - Greetings or capability questions → general
 - DEFAULT → sql
 
-Return ONLY the word sql or general - no markdown, no explanations, no punctuation."""
+**OUTPUT FORMAT:**
+Return ONLY valid JSON. NO markdown, NO explanations, NO text before/after:
+{"intent": "sql", "visualise": "no"}"""
 
 
 def get_general_response_prompt(user_question: str) -> str:
@@ -7,6 +7,8 @@ This module contains prompts for:
 - Natural language response generation with privacy controls
 """
 
+from typing import Optional
+
 
 def get_data_masking_prompt(sql_result: str) -> str:
     """
@@ -134,7 +136,9 @@ Return ONLY the JSON object below. NO markdown, NO explanations, NO text before
 }}"""
 
 
-def get_response_generation_prompt(question: str, result: str, needs_pyodide: bool = False) -> str:
+def get_response_generation_prompt(
+    question: str, result: str, needs_pyodide: bool = False, truncated_to: Optional[int] = None
+) -> str:
     """
     Generate prompt for natural language response from SQL results.
 
@@ -142,6 +146,7 @@ def get_response_generation_prompt(question: str, result: str, needs_pyodide: bo
         question: The user's original question
         result: JSON string of SQL query results
         needs_pyodide: Whether Python analysis is being performed
+        truncated_to: Row cap the result was cut at, or None if it is complete
 
     Returns:
         Formatted prompt string
@@ -168,12 +173,18 @@ def get_response_generation_prompt(question: str, result: str, needs_pyodide: bo
         - Focus on what columns exist and what type of analysis they enable
         """
 
-    return f"""You are a data analyst converting SQL results into natural language. Think step-by-step before responding.
-
-    **Question:** {question}
-    **Data (JSON):** {truncated_result}
+    truncation_instruction = ""
+    if truncated_to is not None:
+        truncation_instruction = f"""
+        **TRUNCATED RESULT:**
+        The query returned more rows than the {truncated_to:,}-row limit; only the first {truncated_to:,} are included.
+        - Say that totals, counts, averages and rankings cover only these {truncated_to:,} rows
+        - DO NOT present them as figures for the whole dataset
+        """
 
-    {pyodide_instruction}
+    # Fixed instructions first, request-specific data last: identical prefixes
+    # let the inference server reuse its prefix (KV) cache across requests
+    return f"""You are a data analyst converting SQL results into natural language. Think step-by-step before responding.
 
     **ANALYSIS STEPS:**
     Before writing your answer:
@@ -247,4 +258,10 @@ The top 3 entries are Person #1 with \$5,000, Person #2 with \$4,200, and Person
 </insight>
 </output_format>
 
+    {pyodide_instruction}
+    {truncation_instruction}
+
+    **Question:** {question}
+    **Data (JSON):** {truncated_result}
+
 Now generate your response following the XML format above:"""
@@ -4,30 +4,29 @@ SQL generation prompts.
 This module contains prompts for:
 - Generating complex SQL queries with reasoning
 - Generating simple SQL queries for Pyodide analysis
+
+Both are system prompts: the user's question is sent as a separate human
+message, so the schema and rules form a prefix that is identical for every
+request and can be served from the inference server's prefix cache.
 """
 
 
-def get_sql_generation_prompt(schema_info: str, user_question: str) -> str:
+def get_sql_generation_prompt(schema_info: str) -> str:
     """
-    Generate prompt for SQL query generation with Chain-of-Thought reasoning.
+    Generate system prompt for SQL query generation with Chain-of-Thought reasoning.
 
     Args:
         schema_info: Database schema information (tables, columns, relationships)
-        user_question: The user's natural language question
 
     Returns:
-        Formatted prompt string with structured reasoning steps
+        Formatted system prompt string with structured reasoning steps
     """
-    return f"""You are an expert PostgreSQL query generator. Analyze the question carefully before generating SQL.
+    return f"""You are an expert PostgreSQL query generator. Analyze the user's question (sent in the next message) carefully before generating SQL.
 
 <database_schema>
 {schema_info}
 </database_schema>
 
-<user_question>
-{user_question}
-</user_question>
-
 <instructions>
 **STEP-BY-STEP APPROACH:**
 Before writing the query, think through:
@@ -103,34 +102,29 @@ LIMIT 10
 </sql>
 </output_format>
 
-Now generate your response following the format above:
+For the user's question, generate your response following the format above.
 """
 
 
-def get_simple_sql_for_pyodide_prompt(schema_info: str, user_question: str) -> str:
+def get_simple_sql_for_pyodide_prompt(schema_info: str) -> str:
     """
-    Generate prompt for creating simple SELECT queries for Pyodide analysis.
+    Generate system prompt for creating simple SELECT queries for Pyodide analysis.
 
     When statistical analysis is needed, we want to fetch raw data rather than
     performing complex aggregations in SQL. Pyodide will handle the analysis.
 
     Args:
         schema_info: Database schema information
-        user_question: The user's question
 
     Returns:
-        Formatted prompt string for simple SQL generation
+        Formatted system prompt string for simple SQL generation
     """
-    return f"""You are an expert PostgreSQL query generator. The user wants statistical analysis that will be performed by Python/Pandas.
+    return f"""You are an expert PostgreSQL query generator. The user (in the next message) wants statistical analysis that will be performed by Python/Pandas.
 
 <database_schema>
 {schema_info}
 </database_schema>
 
-<user_question>
-{user_question}
-</user_question>
-
 **TASK**: Generate a SIMPLE SELECT query to fetch the RAW DATA needed for analysis.
 
 **CRITICAL RULES:**
@@ -30,7 +30,8 @@ Title:"""
 
 def get_visualization_prompt(user_question: str, sql_result: str) -> str:
     """
-    Generate prompt to determine if visualisation is needed.
+    Generate prompt to determine if visualisation is needed, and if so the
+    chart type and title (one call instead of a separate title request).
 
     Args:
         user_question: The user's original question
@@ -70,8 +71,8 @@ Only return "yes" if the user EXPLICITLY requests a visualisation using specific
 **Examples:**
 "What are the top 10 products by sales?" → {{"visualise": "no"}}
 "Show me revenue trends over time" → {{"visualise": "no"}}
-"Create a bar chart of top 10 products" → {{"visualise": "yes", "chart_type": "bar"}}
-"Visualise the sales by region" → {{"visualise": "yes", "chart_type": "bar"}}
+"Create a bar chart of top 10 products" → {{"visualise": "yes", "chart_type": "bar", "title": "Top 10 Products by Sales"}}
+"Visualise the sales by region" → {{"visualise": "yes", "chart_type": "bar", "title": "Sales by Region"}}
 "Don't make a chart, just show the numbers" → {{"visualise": "no"}}
 "Compare A and B" → {{"visualise": "no"}}
 
@@ -82,8 +83,12 @@ Only return "yes" if the user EXPLICITLY requests a visualisation using specific
 - Proportions/breakdown → "pie"
 - Correlation/relationship between two numeric variables → "scatter"
 
+**Chart Title (only if visualise="yes"):**
+- Max 60 characters, Title Case
+- Describe what the chart shows, not the request ("Sales by Region", not "Show Me a Chart")
+
 **OUTPUT FORMAT:**
 Return ONLY valid JSON. NO explanations, NO text before/after:
-{{"visualise": "yes", "chart_type": "bar"}}
+{{"visualise": "yes", "chart_type": "bar", "title": "Sales by Region"}}
 OR
 {{"visualise": "no"}}"""
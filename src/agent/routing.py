@@ -11,13 +11,31 @@ Routing Functions:
 - decide_intent_route: Route between SQL and general conversation
 - decide_sql_retry_route: Handle SQL retry logic with Pyodide fallback
 - decide_pyodide_route: Route based on Pyodide analysis requirement
+- decide_post_sql_route: Retry/fallback, or fan out to the chart and Pyodide branches
+
+Nodes that branch return `Command(update=..., goto=...)`; goto_after_intent and
+post_sql_targets translate the route labels above into graph node names for them.
 """
 
+from typing import List, Union
+
 from src.agent.state import SQLAgentState, is_error_result
 from src.core.logger import setup_logger
 
 logger = setup_logger('cadet.routing')
 
+# Graph node reached by each route label
+INTENT_TARGETS = {
+    "sql": "generate_SQL",
+    "general": "generate_general_response",
+}
+POST_SQL_TARGETS = {
+    "retry": "generate_SQL",
+    "fallback": "generate_SQL",
+    "visualise": "visualisation_request_classification",
+    "pyodide": "generate_pyodide_analysis",
+}
+
 
 class RouteDecider:
     """
@@ -77,14 +95,14 @@ class RouteDecider:
                 
                 if not fallback_attempted:
                     # First time hitting max retries: try Pyodide fallback
-                    logger.warning(f"Max SQL retries ({max_retries}) exceeded. Attempting Pyodide fallback.")
+                    logger.warning("Max SQL retries (%d) exceeded. Attempting Pyodide fallback.", max_retries)
                     return "fallback"
                 else:
                     # Pyodide fallback also failed: give up
-                    logger.error(f"Pyodide fallback also failed. Routing to response with error.")
+                    logger.error("Pyodide fallback also failed. Routing to response with error.")
                     return "success"  # Route to response node with error message
             
-            logger.warning(f"SQL error detected, retry {retry_count + 1}/{max_retries}")
+            logger.warning("SQL error detected, retry %d/%d", retry_count + 1, max_retries)
             return "retry"
         
         logger.info("Query executed successfully")
@@ -103,3 +121,42 @@ class RouteDecider:
             'skip': Skip Pyodide analysis
         """
         return "pyodide" if state.get('needs_pyodide') else "skip"
+    
+    @staticmethod
+    def decide_post_sql_route(state: SQLAgentState, max_retries: int = 3) -> Union[str, List[str]]:
+        """
+        Route after execute_SQL, fanning out once the query result has settled.
+        
+        Visualisation and Pyodide analysis each read only the question and
+        query_result, so on success they are returned together and LangGraph
+        runs them in the same superstep. generate_response is not a branch: it
+        joins after them (graph edges), so the answer stays the last message.
+        
+        Args:
+            state: Current workflow state with query_result and retry counters
+            max_retries: Maximum number of SQL generation attempts (default: 3)
+            
+        Returns:
+            'retry' or 'fallback' as decided by decide_sql_retry_route, otherwise
+            a list of branches: 'visualise' and, when needed, 'pyodide'
+        """
+        route = RouteDecider.decide_sql_retry_route(state, max_retries)
+        if route != "success":
+            return route
+        
+        branches = ["visualise"]
+        if RouteDecider.decide_pyodide_route(state) == "pyodide":
+            branches.append("pyodide")
+        return branches
+    
+    @staticmethod
+    def goto_after_intent(state: SQLAgentState) -> str:
+        """Node to run after intent_classification (for Command.goto)."""
+        return INTENT_TARGETS[RouteDecider.decide_intent_route(state)]
+    
+    @staticmethod
+    def post_sql_targets(route: Union[str, List[str]]) -> Union[str, List[str]]:
+        """Translate a decide_post_sql_route label (or branch list) into node names."""
+        if isinstance(route, list):
+            return [POST_SQL_TARGETS[branch] for branch in route]
+        return POST_SQL_TARGETS[route]
@@ -1,6 +1,17 @@
+import re
+import orjson
+from dataclasses import dataclass
 from typing import TypedDict, Annotated, List, Optional
 from langchain_core.messages import BaseMessage
 import operator
+from src.core.logger import setup_logger
+
+logger = setup_logger('cadet.state')
+
+# Markdown wrapped around classifier answers: code fences, then (legacy
+# one-word answers only) emphasis and quote characters
+_CODE_FENCE_RE = re.compile(r'```(?:json)?')
+_MARKUP_CHARS_RE = re.compile(r"[*`'\"]")
 
 
 class SQLAgentState(TypedDict):
@@ -13,10 +24,13 @@ class SQLAgentState(TypedDict):
 	Attributes:
 		user_question: Original user input extracted from messages
 		intent: Classification result ('sql' for data queries, 'general' for conversation)
+		needs_visualisation: Whether the user explicitly asked for a chart (None if unknown)
 		sql_query: Generated PostgreSQL query string
 		query_result: JSON string of query results or error message starting with "Error:"
+		query_truncated: Whether execute_SQL cut the result at SQL_MAX_ROWS rows
 		plotly_data: JSON string containing Plotly chart specification (not dict!)
 		needs_pyodide: Whether Pyodide (Python) analysis is required
+		pyodide_code: Python code for the browser, emitted as a ToolMessage by generate_response
 		pyodide_fallback_attempted: Whether Pyodide fallback has been attempted after SQL failures
 		sql_retry_count: Counter for SQL generation/execution failures (prevents token overflow)
 		messages: List of messages accumulated via operator.add
@@ -33,18 +47,73 @@ class SQLAgentState(TypedDict):
 
 	user_question: Optional[str]
 	intent: Optional[str]  # 'sql' | 'general'
+	needs_visualisation: Optional[bool]  # Set by intent_classification (fused call)
 
 	sql_query: Optional[str]
 	query_result: Optional[str]
+	query_truncated: Optional[bool]  # Result cut at SQL_MAX_ROWS (answers must say so)
 
 	plotly_data: Optional[str]  # JSON string, NOT dict!
 	needs_pyodide: Optional[bool]
+	pyodide_code: Optional[str]  # Set by generate_pyodide_analysis (None when skipped)
 	pyodide_fallback_attempted: Optional[bool]  # Prevents infinite fallback loop
 	sql_retry_count: Optional[int]  # Counter for SQL failures (prevents token overflow)
 
 	messages: Annotated[List[BaseMessage], operator.add]
 
 
+@dataclass(slots=True, frozen=True)
+class Classification:
+	"""
+	Parsed verdict of the fused intent/visualisation LLM call.
+
+	Immutable, so one instance can be cached and shared between requests.
+	It is written to the state as a single update via `to_state_update()`;
+	needs_pyodide is deliberately not part of it because the Pyodide
+	fallback flips that flag later in the run.
+
+	Attributes:
+		intent: 'sql' or 'general'
+		needs_visualisation: Whether a chart was requested (None if unknown)
+	"""
+
+	intent: str
+	needs_visualisation: Optional[bool]
+
+	@classmethod
+	def from_llm_output(cls, content: str) -> "Classification":
+		"""
+		Parse the classifier's JSON answer, tolerating the legacy one-word format.
+
+		Example:
+			>>> Classification.from_llm_output('{"intent": "sql", "visualise": "yes"}')
+			Classification(intent='sql', needs_visualisation=True)
+		"""
+		content = _CODE_FENCE_RE.sub("", content).strip()
+
+		try:
+			parsed = orjson.loads(content)
+			intent = str(parsed.get('intent', '')).strip().lower()
+			needs_visualisation = parsed.get('visualise') == 'yes'
+		except (orjson.JSONDecodeError, AttributeError):
+			# Legacy single-word answer: visualisation verdict unknown
+			intent = _MARKUP_CHARS_RE.sub("", content.lower()).strip()
+			needs_visualisation = None
+
+		if intent not in ('sql', 'general'):
+			logger.warning("Invalid intent '%s', defaulting to 'general'", content)
+			intent = 'general'
+
+		if intent == 'general':
+			needs_visualisation = False
+
+		return cls(intent=intent, needs_visualisation=needs_visualisation)
+
+	def to_state_update(self) -> dict:
+		"""Return the classification as one SQLAgentState update."""
+		return {"intent": self.intent, "needs_visualisation": self.needs_visualisation}
+
+
 def is_error_result(query_result: Optional[str]) -> bool:
 	"""
 	Check if query result contains an error.
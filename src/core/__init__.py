@@ -12,7 +12,7 @@ from .errors import (
     SchemaLoadError,
     LLMError,
 )
-from .db import get_db_engine
+from .db import get_db_engine, get_async_db_engine
 from .validation import validate_user_input, validate_sql_query
 
 __all__ = [
@@ -25,6 +25,7 @@ __all__ = [
     'LLMError',
     # Database
     'get_db_engine',
+    'get_async_db_engine',
     # Validation
     'validate_user_input',
     'validate_sql_query',
@@ -1,7 +1,9 @@
 import os
+import orjson
 from typing import Optional
 from sqlalchemy import create_engine, Engine, text
 from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import create_async_engine, AsyncEngine
 from dotenv import load_dotenv
 from src.core.logger import setup_logger
 
@@ -38,14 +40,56 @@ class DatabaseConfig:
 
         return f"postgresql://{user}:{password}@{host}:{port}/{name}"
 
+    @staticmethod
+    def get_async_db_url() -> str:
+        """
+        Construct the asyncpg connection URL used by the agent's async engine.
+
+        Returns:
+            Database connection URL string (postgresql+asyncpg://...)
+
+        Raises:
+            ValueError: If required environment variables are missing
+        """
+        return DatabaseConfig.get_db_url().replace("postgresql://", "postgresql+asyncpg://", 1)
+
+    @staticmethod
+    def get_pool_settings() -> dict:
+        """
+        Connection pool sizing for the long-running agent server.
+
+        Each request may run several SQL attempts (retries, Pyodide fallback),
+        so the server pool is larger than get_db_engine's defaults. Both sizes
+        can be overridden with DB_POOL_SIZE and DB_POOL_OVERFLOW. Connections
+        are checked out LIFO, so steady traffic keeps reusing the same few warm
+        connections and the rest stay idle until a burst needs them.
 
-def get_db_engine(pool_size: int = 5, max_overflow: int = 10) -> Engine:
+        Returns:
+            Keyword arguments for get_db_engine / get_async_db_engine
+        """
+        return {
+            'pool_size': int(os.getenv('DB_POOL_SIZE', '10')),
+            'max_overflow': int(os.getenv('DB_POOL_OVERFLOW', '20')),
+            'pool_use_lifo': True,
+        }
+
+
+def get_db_engine(
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    pool_timeout: int = 30,
+    pool_recycle: int = 1800,
+    pool_use_lifo: bool = False,
+) -> Engine:
     """
     Create and return a SQLAlchemy engine with connection pooling.
 
     Args:
         pool_size: Number of connections to maintain in the pool
         max_overflow: Maximum number of connections beyond pool_size
+        pool_timeout: Seconds to wait for a free connection before failing
+        pool_recycle: Seconds after which a pooled connection is replaced
+        pool_use_lifo: Check out the most recently returned connection first
 
     Returns:
         SQLAlchemy Engine instance
@@ -66,6 +110,9 @@ def get_db_engine(pool_size: int = 5, max_overflow: int = 10) -> Engine:
             pool_pre_ping=True,  # Verify connections before using
             pool_size=pool_size,
             max_overflow=max_overflow,
+            pool_timeout=pool_timeout,
+            pool_recycle=pool_recycle,  # Replace connections before server-side idle timeouts
+            pool_use_lifo=pool_use_lifo,
             echo=False  # Set to True for SQL debugging
         )
 
@@ -82,3 +129,60 @@ def get_db_engine(pool_size: int = 5, max_overflow: int = 10) -> Engine:
     except SQLAlchemyError as e:
         logger.error(f"Database connection failed: {e}")
         raise
+
+
+def get_async_db_engine(
+    pool_size: int = 5,
+    max_overflow: int = 10,
+    pool_timeout: int = 30,
+    pool_recycle: int = 1800,
+    pool_use_lifo: bool = False,
+) -> AsyncEngine:
+    """
+    Create and return an asyncpg-backed SQLAlchemy AsyncEngine.
+
+    The agent awaits queries on this engine, so a slow query no longer pins a
+    worker thread. Unlike get_db_engine, no test query is run here: creating
+    an AsyncEngine does not connect, and the first checkout is pre-pinged.
+
+    asyncpg itself returns json/jsonb columns as str (psycopg2 decodes them).
+    SQLAlchemy's asyncpg dialect registers a json/jsonb codec on every new
+    connection using json_deserializer, so such columns arrive as dicts/lists,
+    as they did on psycopg2, and are not re-encoded as strings by the result
+    serialisation in execute_SQL.
+
+    Args:
+        pool_size: Number of connections to maintain in the pool
+        max_overflow: Maximum number of connections beyond pool_size
+        pool_timeout: Seconds to wait for a free connection before failing
+        pool_recycle: Seconds after which a pooled connection is replaced
+        pool_use_lifo: Check out the most recently returned connection first
+
+    Returns:
+        SQLAlchemy AsyncEngine instance
+
+    Raises:
+        ValueError: If required environment variables are missing
+
+    Example:
+        >>> engine = get_async_db_engine()
+        >>> async with engine.connect() as conn:
+        ...     result = await conn.execute(text("SELECT COUNT(*) FROM sales"))
+    """
+    try:
+        db_url = DatabaseConfig.get_async_db_url()
+    except ValueError as e:
+        logger.error(f"Configuration error: {e}")
+        raise
+
+    return create_async_engine(
+        db_url,
+        pool_pre_ping=True,  # Verify connections before using
+        pool_size=pool_size,
+        max_overflow=max_overflow,
+        pool_timeout=pool_timeout,
+        pool_recycle=pool_recycle,  # Replace connections before server-side idle timeouts
+        pool_use_lifo=pool_use_lifo,
+        json_deserializer=orjson.loads,  # Decodes json/jsonb columns (see above)
+        echo=False  # Set to True for SQL debugging
+    )
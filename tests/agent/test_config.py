@@ -7,6 +7,8 @@ are properly initialised with correct values.
 
 import pytest
 from src.agent.config import (
+    get_llm_intent,
+    get_llm_sql,
     llm_intent,
     llm_sql,
     llm_vis,
@@ -55,6 +57,24 @@ class TestLLMInstances:
         assert llm_sql.model_name == llm_vis.model_name
         assert llm_vis.model_name == llm_response.model_name
     
+    def test_all_llms_share_http_clients(self):
+        """All LLM instances should reuse one sync and one async connection pool."""
+        for instance in (llm_sql, llm_vis, llm_response):
+            assert instance.http_client is llm_intent.http_client
+            assert instance.http_async_client is llm_intent.http_async_client
+    
+    def test_all_llms_share_sdk_clients(self):
+        """All LLM instances should reuse the base model's OpenAI SDK clients."""
+        for instance in (llm_sql, llm_vis, llm_response):
+            assert instance.client is llm_intent.client
+            assert instance.async_client is llm_intent.async_client
+    
+    def test_llm_getters_return_cached_instance(self):
+        """Getters should build each LLM once and back the legacy module names."""
+        assert get_llm_intent() is get_llm_intent()
+        assert get_llm_intent() is llm_intent
+        assert get_llm_sql() is llm
+    
     def test_all_llms_use_cerebras_base_url(self):
         """All LLM instances should use Cerebras API endpoint."""
         expected_url = "https://api.cerebras.ai/v1"
@@ -92,9 +112,9 @@ class TestConfigurationConstants:
         """Should have exactly 5 valid chart types."""
         assert len(VALID_CHART_TYPES) == 5
     
-    def test_valid_chart_types_is_set(self):
-        """VALID_CHART_TYPES should be a set for efficient lookup."""
-        assert isinstance(VALID_CHART_TYPES, set)
+    def test_valid_chart_types_is_frozenset(self):
+        """VALID_CHART_TYPES should be an immutable set for efficient lookup."""
+        assert isinstance(VALID_CHART_TYPES, frozenset)
     
     def test_invalid_chart_types_not_included(self):
         """Invalid chart types should not be in VALID_CHART_TYPES."""
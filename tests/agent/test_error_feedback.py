@@ -0,0 +1,163 @@
+"""
+Tests for SQL error feedback routing.
+
+These tests validate that error messages from failed SQL attempts are
+routed to the correct feedback generator on retry.
+"""
+
+import pytest
+from src.agent.error_feedback import get_sql_error_feedback
+from src.agent.feedbacks import (
+    get_unknown_tables_feedback,
+    get_multiple_statements_feedback,
+    get_sql_comments_feedback,
+    get_forbidden_keyword_feedback,
+    get_column_not_found_feedback,
+    get_alias_reference_feedback,
+    get_division_by_zero_feedback,
+    get_datetime_format_feedback,
+    get_parsing_error_feedback,
+    get_generic_retry_feedback,
+)
+
+
+@pytest.fixture
+def allowed_tables():
+    """Common allowed tables for testing"""
+    return {'sales', 'customers'}
+
+
+class TestGetSQLErrorFeedback:
+    """Test suite for error message → feedback routing."""
+
+    def test_unknown_short_table_is_treated_as_alias(self, allowed_tables):
+        """Should give CTE guidance when unknown table looks like an alias."""
+        result = get_sql_error_feedback("Error: Unknown tables in query: {'t'}", allowed_tables)
+        assert result == get_unknown_tables_feedback({'t'}, allowed_tables, is_likely_alias=True)
+
+    def test_unknown_long_table_lists_allowed_tables(self, allowed_tables):
+        """Should list valid tables when an invented table name is used."""
+        result = get_sql_error_feedback("Error: Unknown tables in query: {'orders'}", allowed_tables)
+        assert result == get_unknown_tables_feedback({'orders'}, allowed_tables, is_likely_alias=False)
+
+    def test_unknown_tables_with_several_names(self, allowed_tables):
+        """Should extract every quoted table name from the set repr."""
+        result = get_sql_error_feedback("Error: Unknown tables in query: {'orders', 'items'}", allowed_tables)
+        assert result == get_unknown_tables_feedback({'orders', 'items'}, allowed_tables, is_likely_alias=False)
+
+    def test_unknown_tables_without_names_uses_parsing_feedback(self, allowed_tables):
+        """Should fall back to generic feedback when no table name can be extracted."""
+        error = "Error: Unknown tables in query: {}"
+        assert get_sql_error_feedback(error, allowed_tables) == get_parsing_error_feedback(error)
+
+    def test_multiple_statements(self, allowed_tables):
+        """Should route multiple statement errors."""
+        result = get_sql_error_feedback("Error: Multiple SQL statements not allowed", allowed_tables)
+        assert result == get_multiple_statements_feedback()
+
+    def test_sql_comments(self, allowed_tables):
+        """Should route SQL comment errors."""
+        result = get_sql_error_feedback("Error: SQL comments not allowed", allowed_tables)
+        assert result == get_sql_comments_feedback()
+
+    def test_forbidden_create(self, allowed_tables):
+        """Should route CREATE keyword errors."""
+        result = get_sql_error_feedback("Error: Forbidden SQL keyword: CREATE", allowed_tables)
+        assert result == get_forbidden_keyword_feedback('CREATE')
+
+    def test_missing_column_uses_alias_feedback(self, allowed_tables):
+        """Should name the missing column when it can be extracted."""
+        result = get_sql_error_feedback('Error: column "total" does not exist', allowed_tables)
+        assert result == get_alias_reference_feedback('total')
+
+    def test_missing_column_without_name(self, allowed_tables):
+        """Should fall back to generic column feedback when name is not quoted."""
+        result = get_sql_error_feedback("Error: Column total does not exist", allowed_tables)
+        assert result == get_column_not_found_feedback()
+
+    def test_missing_relation_is_not_column_error(self, allowed_tables):
+        """Should not treat 'relation does not exist' as a column error."""
+        error = 'Error: relation "foo" does not exist'
+        assert get_sql_error_feedback(error, allowed_tables) == get_parsing_error_feedback(error)
+
+    def test_division_by_zero(self, allowed_tables):
+        """Should route division by zero errors."""
+        result = get_sql_error_feedback("Error: Division by zero", allowed_tables)
+        assert result == get_division_by_zero_feedback()
+
+    def test_datetime_format(self, allowed_tables):
+        """Should route datetime format errors."""
+        result = get_sql_error_feedback("Error: invalid datetime format", allowed_tables)
+        assert result == get_datetime_format_feedback()
+
+    def test_priority_follows_case_order(self, allowed_tables):
+        """Should prefer the earlier case when several phrases match."""
+        error = 'Error: division by zero near column "x" does not exist'
+        assert get_sql_error_feedback(error, allowed_tables) == get_alias_reference_feedback('x')
+
+    def test_unmatched_error_uses_parsing_feedback(self, allowed_tables):
+        """Should fall back to generic syntax feedback."""
+        error = "Error: syntax error at or near SELECT"
+        assert get_sql_error_feedback(error, allowed_tables) == get_parsing_error_feedback(error)
+
+    def test_repeated_error_is_served_from_cache(self, allowed_tables):
+        """Should reuse the memoized feedback for an identical error and schema."""
+        from src.agent.error_feedback import _get_sql_error_feedback_cached
+
+        error = "Error: Multiple SQL statements not allowed (cache test)"
+        first = get_sql_error_feedback(error, allowed_tables)
+        hits_before = _get_sql_error_feedback_cached.cache_info().hits
+        second = get_sql_error_feedback(error, set(allowed_tables))
+
+        assert first == second
+        assert _get_sql_error_feedback_cached.cache_info().hits == hits_before + 1
+
+
+class TestGetGenericRetryFeedback:
+    """Test suite for generic retry feedback."""
+
+    def test_intermediate_retry(self):
+        """Should show the retry counter on non-final attempts."""
+        feedback = get_generic_retry_feedback(1, 3)
+        assert "RETRY ATTEMPT 1/3" in feedback
+
+    def test_final_retry(self):
+        """Should warn on the last attempt."""
+        feedback = get_generic_retry_feedback(2, 3)
+        assert "FINAL ATTEMPT (Retry 2/3)" in feedback
+
+    def test_unconfigured_limit_is_formatted_on_demand(self):
+        """Should still format pairs outside the precomputed table."""
+        assert "RETRY ATTEMPT 2/10" in get_generic_retry_feedback(2, 10)
+        assert "FINAL ATTEMPT (Retry 9/10)" in get_generic_retry_feedback(9, 10)
+
+    def test_precomputed_table_matches_inline_formatting(self):
+        """Should return exactly what the original f-string version built."""
+        from src.agent.feedbacks import _RETRY_FEEDBACKS
+
+        def inline_feedback(retry_count, max_retries):
+            if retry_count >= max_retries - 1:
+                return f"""
+
+**FINAL ATTEMPT (Retry {retry_count}/{max_retries}):**
+This is your last chance to generate a valid SQL query.
+
+Review the error message carefully and:
+1. Use ONLY exact table names from the schema
+2. Quote ALL column names with double quotes: "columnName"
+3. Use CTEs instead of subqueries
+4. Generate exactly ONE SELECT query
+5. Do NOT include comments or explanations
+
+If you're uncertain, prefer a simpler query that you're confident will work.
+"""
+            return f"""
+
+**RETRY ATTEMPT {retry_count}/{max_retries}:**
+Your previous SQL query failed validation.
+
+Carefully read the error message above and fix the specific issue mentioned.
+"""
+
+        for retry_count, max_retries in [*_RETRY_FEEDBACKS, (2, 10), (9, 10)]:
+            assert get_generic_retry_feedback(retry_count, max_retries) == inline_feedback(retry_count, max_retries)
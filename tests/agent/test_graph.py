@@ -0,0 +1,126 @@
+"""
+Tests for workflow assembly and compilation.
+
+These tests validate that the LangGraph workflow is compiled once per
+process and shared by every caller, and that a SQL answer reaches the
+thread after the chart and Python analysis messages.
+"""
+
+import asyncio
+import importlib
+from typing import Literal
+
+import pytest
+from langchain_core.messages import AIMessage, HumanMessage, ToolMessage
+from langgraph.graph import StateGraph
+from langgraph.types import Command
+from src.agent import graph, nodes
+from src.agent.graph import get_app
+
+
+class TestGetApp:
+    """Test suite for compiled workflow caching."""
+    
+    def test_returns_same_compiled_app(self):
+        """Should compile once and return the cached app afterwards."""
+        assert get_app() is get_app()
+    
+    def test_module_app_is_cached_app(self):
+        """Should expose the cached app as the langgraph.json entry point."""
+        assert graph.app is get_app()
+    
+    def test_import_does_not_compile(self, monkeypatch):
+        """Should defer compilation until the app is first requested."""
+        compiled = []
+        original_compile = StateGraph.compile
+        
+        def counting_compile(self, *args, **kwargs):
+            compiled.append(self)
+            return original_compile(self, *args, **kwargs)
+        
+        monkeypatch.setattr(StateGraph, "compile", counting_compile)
+        # The reload rebinds these; put the originals back for the other tests
+        for name in ("build_workflow", "workflow", "get_app", "__getattr__"):
+            monkeypatch.setattr(graph, name, getattr(graph, name))
+        
+        importlib.reload(graph)
+        assert compiled == []
+        graph.app
+        assert len(compiled) == 1
+    
+    def test_default_has_no_checkpointer(self):
+        """Should compile without a checkpointer unless one is given."""
+        assert get_app().checkpointer is None
+    
+    def test_checkpointer_is_passed_to_compile(self):
+        """Should compile a separate app bound to the given checkpointer."""
+        saver = object()
+        assert get_app(saver).checkpointer is saver
+        assert get_app(saver) is not get_app()
+    
+    def test_unknown_attribute_raises(self):
+        """Should keep raising AttributeError for other missing names."""
+        with pytest.raises(AttributeError):
+            graph.not_a_real_attribute
+
+
+class TestBuildWorkflow:
+    """Test suite for workflow edges."""
+    
+    def test_classifiers_fan_out_from_read_question(self):
+        """Should start intent and Pyodide classification in parallel."""
+        from src.agent.graph import build_workflow
+        edges = build_workflow().edges
+        assert ("read_question", "intent_classification") in edges
+        assert ("read_question", "pyodide_request_classification") in edges
+
+
+class TestResultMessageOrder:
+    """Test suite for the message order after a successful query."""
+    
+    @pytest.fixture
+    def run_sql_question(self, monkeypatch):
+        """Run the real graph with the LLM and database nodes faked."""
+        async def intent(state) -> Command[Literal["generate_SQL", "generate_general_response"]]:
+            return Command(update={"intent": "sql"}, goto="generate_SQL")
+        
+        async def generate_sql(state):
+            return {"sql_query": "SELECT 1", "query_result": None}
+        
+        async def run_sql(state):
+            return {"query_result": '[{"x": "a", "y": 1}]'}
+        
+        async def visualise(state):
+            chart = ToolMessage(content="chart", tool_call_id="call_visualisation_1", name="create_plotly_chart")
+            return {"messages": [chart], "plotly_data": "chart"}
+        
+        async def pyodide_analysis(state):
+            return {"pyodide_code": "print(1)"}
+        
+        async def draft_response(state):
+            return {"messages": [AIMessage(content="answer")]}
+        
+        monkeypatch.setattr(graph, "intent_classification", intent)
+        monkeypatch.setattr(graph, "generate_SQL", generate_sql)
+        monkeypatch.setattr(graph, "visualisation_request_classification", visualise)
+        monkeypatch.setattr(graph, "generate_pyodide_analysis", pyodide_analysis)
+        monkeypatch.setattr(nodes, "_run_sql", run_sql)
+        monkeypatch.setattr(nodes, "_draft_response", draft_response)
+        
+        def run(needs_pyodide):
+            monkeypatch.setattr(
+                graph, "pyodide_request_classification", lambda state: {"needs_pyodide": needs_pyodide}
+            )
+            app = graph.build_workflow().compile()
+            result = asyncio.run(app.ainvoke({"messages": [HumanMessage(content="plot x")]}))
+            return [message.content for message in result["messages"][1:]]
+        
+        return run
+    
+    def test_answer_follows_chart(self, run_sql_question):
+        """Should emit the chart before the answer."""
+        assert run_sql_question(False) == ["chart", "answer"]
+    
+    def test_answer_follows_chart_and_pyodide(self, run_sql_question):
+        """Should emit chart, Python analysis and answer in that order."""
+        assert run_sql_question(True) == ["chart", "print(1)", "answer"]
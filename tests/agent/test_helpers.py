@@ -7,19 +7,27 @@ that are used throughout the agent workflow.
 
 import pytest
 import json
+import asyncio
 from unittest.mock import patch, mock_open, MagicMock
 from src.agent.helpers import (
     get_cached_engine,
     load_schema_info,
-    apply_pii_masking
+    apply_pii_masking,
+    coalesced_ainvoke,
+    LRUCache,
+    sql_cache_key,
+    get_schema_hash,
+    get_allowed_tables,
+    get_pyodide_code_cache,
+    chart_cache_key
 )
 from src.core.errors import SchemaLoadError
 
 
 class TestGetCachedEngine:
-    """Test suite for database engine caching."""
+    """Test suite for async database engine caching."""
     
-    @patch('src.agent.helpers.get_db_engine')
+    @patch('src.agent.helpers.get_async_db_engine')
     def test_creates_engine_on_first_call(self, mock_get_db):
         """Should create engine on first call and cache it."""
         mock_engine = MagicMock()
@@ -33,7 +41,7 @@ class TestGetCachedEngine:
         assert engine == mock_engine
         mock_get_db.assert_called_once()
     
-    @patch('src.agent.helpers.get_db_engine')
+    @patch('src.agent.helpers.get_async_db_engine')
     def test_uses_cached_engine_on_second_call(self, mock_get_db):
         """Should use cached engine on subsequent calls."""
         mock_engine = MagicMock()
@@ -47,14 +55,42 @@ class TestGetCachedEngine:
         
         assert engine1 == engine2
         assert mock_get_db.call_count == 1
+    
+    @patch.dict('os.environ', {'DB_POOL_SIZE': '4', 'DB_POOL_OVERFLOW': '6'})
+    @patch('src.agent.helpers.get_async_db_engine')
+    def test_pool_size_from_environment(self, mock_get_db):
+        """Should size the agent pool from DB_POOL_SIZE / DB_POOL_OVERFLOW."""
+        import src.agent.helpers as helpers
+        helpers._DB_ENGINE = None
+        
+        get_cached_engine()
+        
+        mock_get_db.assert_called_once_with(pool_size=4, max_overflow=6, pool_use_lifo=True)
+    
+    @patch.dict('os.environ', {'DB_USER': 'u', 'DB_PASSWORD': 'p', 'DB_NAME': 'd'})
+    @patch('src.core.db.create_async_engine')
+    def test_async_engine_decodes_json_columns(self, mock_create):
+        """Should give the asyncpg dialect a JSON deserializer for json/jsonb columns."""
+        import orjson
+        from src.core.db import get_async_db_engine
+        
+        get_async_db_engine()
+        
+        url = mock_create.call_args.args[0]
+        assert url.startswith("postgresql+asyncpg://")
+        assert mock_create.call_args.kwargs['json_deserializer'] is orjson.loads
 
 
 class TestLoadSchemaInfo:
     """Test suite for schema loading and caching."""
     
+    def setup_method(self):
+        """Drop the parsed schema so each test reads its own file."""
+        import src.agent.helpers as helpers
+        helpers._SCHEMA_DATA = None
+    
     @patch('builtins.open', new_callable=mock_open, read_data='{"llm_prompt": "test schema"}')
-    @patch('os.path.exists', return_value=True)
-    def test_loads_schema_successfully(self, mock_exists, mock_file):
+    def test_loads_schema_successfully(self, mock_file):
         """Should load and cache schema from JSON file."""
         import src.agent.helpers as helpers
         helpers._SCHEMA_CACHE = None
@@ -64,8 +100,8 @@ class TestLoadSchemaInfo:
         assert result == "test schema"
         mock_file.assert_called_once()
     
-    @patch('os.path.exists', return_value=False)
-    def test_raises_error_when_schema_file_missing(self, mock_exists):
+    @patch('builtins.open', side_effect=FileNotFoundError)
+    def test_raises_error_when_schema_file_missing(self, mock_file):
         """Should raise SchemaLoadError when file doesn't exist."""
         import src.agent.helpers as helpers
         helpers._SCHEMA_CACHE = None
@@ -76,8 +112,7 @@ class TestLoadSchemaInfo:
         assert "not found" in str(exc_info.value)
     
     @patch('builtins.open', new_callable=mock_open, read_data='{"llm_prompt": ""}')
-    @patch('os.path.exists', return_value=True)
-    def test_raises_error_when_prompt_empty(self, mock_exists, mock_file):
+    def test_raises_error_when_prompt_empty(self, mock_file):
         """Should raise SchemaLoadError when llm_prompt is empty."""
         import src.agent.helpers as helpers
         helpers._SCHEMA_CACHE = None
@@ -88,8 +123,7 @@ class TestLoadSchemaInfo:
         assert "Empty llm_prompt" in str(exc_info.value)
     
     @patch('builtins.open', new_callable=mock_open, read_data='invalid json')
-    @patch('os.path.exists', return_value=True)
-    def test_raises_error_on_invalid_json(self, mock_exists, mock_file):
+    def test_raises_error_on_invalid_json(self, mock_file):
         """Should raise SchemaLoadError on invalid JSON."""
         import src.agent.helpers as helpers
         helpers._SCHEMA_CACHE = None
@@ -100,8 +134,7 @@ class TestLoadSchemaInfo:
         assert "Invalid JSON" in str(exc_info.value)
     
     @patch('builtins.open', new_callable=mock_open, read_data='{"llm_prompt": "cached schema"}')
-    @patch('os.path.exists', return_value=True)
-    def test_uses_cached_schema_on_second_call(self, mock_exists, mock_file):
+    def test_uses_cached_schema_on_second_call(self, mock_file):
         """Should return cached schema without re-reading file."""
         import src.agent.helpers as helpers
         helpers._SCHEMA_CACHE = None
@@ -111,11 +144,57 @@ class TestLoadSchemaInfo:
         
         assert result1 == result2 == "cached schema"
         assert mock_file.call_count == 1
+    
+    @patch('builtins.open', new_callable=mock_open, read_data='{"llm_prompt": "hashed schema"}')
+    def test_schema_hash_computed_with_schema(self, mock_file):
+        """Should hash the schema once when it loads and reuse the digest."""
+        import hashlib
+        import src.agent.helpers as helpers
+        helpers._SCHEMA_CACHE = None
+        
+        expected = hashlib.blake2b(b"hashed schema", digest_size=16).digest()
+        assert get_schema_hash() == expected
+        assert get_schema_hash() is get_schema_hash()
+        assert mock_file.call_count == 1
+
+
+class TestGetAllowedTables:
+    """Test suite for cached allowed table names."""
+    
+    def setup_method(self):
+        """Drop the parsed schema and derived tables between tests."""
+        import src.agent.helpers as helpers
+        helpers._SCHEMA_DATA = None
+        helpers._ALLOWED_TABLES = None
+    
+    @patch('builtins.open', new_callable=mock_open,
+           read_data='{"llm_prompt": "schema", "tables": {"sales": {}, "customers": {}}}')
+    def test_reads_tables_once(self, mock_file):
+        """Should derive table names from a single schema parse."""
+        import src.agent.helpers as helpers
+        helpers._SCHEMA_CACHE = None
+        
+        load_schema_info()
+        assert get_allowed_tables() == {"sales", "customers"}
+        assert get_allowed_tables() is get_allowed_tables()
+        assert mock_file.call_count == 1
+    
+    @patch('builtins.open', new_callable=mock_open, read_data='{"llm_prompt": "schema"}')
+    def test_raises_error_without_tables(self, mock_file):
+        """Should raise SchemaLoadError when the schema lists no tables."""
+        with pytest.raises(SchemaLoadError):
+            get_allowed_tables()
 
 
 class TestApplyPIIMasking:
     """Test suite for PII masking functionality."""
     
+    def setup_method(self):
+        """Reset the PII column cache so each test reads its own config."""
+        import src.agent.helpers as helpers
+        helpers._SCHEMA_DATA = None
+        helpers._PII_COLUMNS = None
+    
     @patch('builtins.open', new_callable=mock_open, 
            read_data='{"pii_columns": {"users": ["firstName", "lastName"]}}')
     def test_masks_pii_columns_correctly(self, mock_file):
@@ -146,6 +225,17 @@ class TestApplyPIIMasking:
         
         assert result == rows
     
+    def test_schema_read_failure_is_not_cached(self):
+        """Should mask again once the schema file can be read after a failure."""
+        with patch('builtins.open', side_effect=FileNotFoundError):
+            assert apply_pii_masking([{"name": "Alice"}]) == [{"name": "Alice"}]
+        
+        with patch('builtins.open', new_callable=mock_open,
+                   read_data='{"pii_columns": {"users": ["name"]}}'):
+            masked = apply_pii_masking([{"name": "Alice"}])
+        
+        assert masked[0]["name"] == "Person #1"
+    
     @patch('builtins.open', new_callable=mock_open, read_data='{"pii_columns": {}}')
     def test_returns_original_when_pii_columns_empty(self, mock_file):
         """Should return original rows when no PII columns configured."""
@@ -183,3 +273,240 @@ class TestApplyPIIMasking:
         assert "lastName" not in masked[0]
         assert "email" not in masked[0]
         assert masked[0]["revenue"] == 2000
+    
+    @patch('builtins.open', new_callable=mock_open,
+           read_data='{"pii_columns": {"users": ["name"]}}')
+    def test_returns_original_when_result_has_no_pii(self, mock_file):
+        """Should return rows untouched when no PII column was selected."""
+        rows = [{"city": "Sydney", "revenue": 1000}]
+        assert apply_pii_masking(rows) is rows
+    
+    @patch('builtins.open', new_callable=mock_open,
+           read_data='{"pii_columns": {"users": ["firstName", "lastName"]}}')
+    def test_preserves_column_order(self, mock_file):
+        """Should keep the masked column in its original position."""
+        rows = [{"id": 1, "lastName": "Doe", "firstName": "John", "revenue": None}]
+        
+        masked = apply_pii_masking(rows)
+        
+        assert list(masked[0].items()) == [("id", 1), ("lastName", "Person #1"), ("revenue", None)]
+    
+    @patch('builtins.open', new_callable=mock_open,
+           read_data='{"pii_columns": {"users": ["name"]}}')
+    def test_reads_pii_config_once(self, mock_file):
+        """Should cache PII columns instead of re-reading the schema file."""
+        apply_pii_masking([{"name": "Alice"}])
+        masked = apply_pii_masking([{"name": "Bob"}])
+        
+        assert masked[0]["name"] == "Person #1"
+        assert mock_file.call_count == 1
+    
+    @patch('builtins.open', new_callable=mock_open,
+           read_data='{"llm_prompt": "schema", "pii_columns": {"users": ["name"]}}')
+    def test_shares_schema_parse_with_load_schema_info(self, mock_file):
+        """Should reuse the parse done by load_schema_info."""
+        import src.agent.helpers as helpers
+        helpers._SCHEMA_CACHE = None
+        
+        load_schema_info()
+        masked = apply_pii_masking([{"name": "Alice"}])
+        
+        assert masked[0]["name"] == "Person #1"
+        assert mock_file.call_count == 1
+    
+    @patch('builtins.open', new_callable=mock_open,
+           read_data='{"pii_columns": {"users": ["name"]}}')
+    def test_masking_logs_are_sampled(self, mock_file):
+        """Should log masking details for only 1 in PII_LOG_EVERY calls."""
+        import itertools
+        import src.agent.helpers as helpers
+        
+        with patch.object(helpers, 'PII_LOG_EVERY', 3), \
+             patch.object(helpers, '_MASK_LOG_COUNTER', itertools.count()), \
+             patch.object(helpers.logger, 'info') as mock_info:
+            for _ in range(3):
+                apply_pii_masking([{"name": "Alice"}])
+        
+        assert mock_info.call_count == 2  # columns + count, from the first call only
+
+
+class TestCoalescedAinvoke:
+    """Test suite for sharing identical in-flight LLM calls."""
+    
+    class _SlowLLM:
+        def __init__(self):
+            self.calls = []
+        
+        async def ainvoke(self, prompt):
+            self.calls.append(prompt)
+            await asyncio.sleep(0.01)
+            return f"answer to {prompt}"
+    
+    def test_identical_concurrent_prompts_share_one_call(self):
+        """Should send one request for identical prompts awaited concurrently."""
+        llm = self._SlowLLM()
+        
+        async def run():
+            return await asyncio.gather(*(coalesced_ainvoke(llm, "q") for _ in range(3)))
+        
+        assert asyncio.run(run()) == ["answer to q"] * 3
+        assert llm.calls == ["q"]
+    
+    def test_different_prompts_are_not_shared(self):
+        """Should send separate requests for different prompts."""
+        llm = self._SlowLLM()
+        
+        async def run():
+            return await asyncio.gather(coalesced_ainvoke(llm, "a"), coalesced_ainvoke(llm, "b"))
+        
+        assert asyncio.run(run()) == ["answer to a", "answer to b"]
+        assert sorted(llm.calls) == ["a", "b"]
+    
+    def test_completed_call_is_not_reused(self):
+        """Should issue a fresh request once the previous one has finished."""
+        llm = self._SlowLLM()
+        
+        asyncio.run(coalesced_ainvoke(llm, "q"))
+        asyncio.run(coalesced_ainvoke(llm, "q"))
+        
+        assert llm.calls == ["q", "q"]
+    
+    def test_identical_message_lists_share_one_call(self):
+        """Should coalesce chat message lists with the same roles and contents."""
+        llm = self._SlowLLM()
+        
+        def messages():
+            return [
+                MagicMock(type="system", content="schema"),
+                MagicMock(type="human", content="q"),
+            ]
+        
+        async def run():
+            return await asyncio.gather(
+                coalesced_ainvoke(llm, messages()), coalesced_ainvoke(llm, messages())
+            )
+        
+        asyncio.run(run())
+        assert len(llm.calls) == 1
+    
+    def test_message_lists_with_different_contents_are_not_shared(self):
+        """Should keep message lists apart when a message differs."""
+        llm = self._SlowLLM()
+        
+        async def run():
+            return await asyncio.gather(
+                coalesced_ainvoke(llm, [MagicMock(type="human", content="a")]),
+                coalesced_ainvoke(llm, [MagicMock(type="human", content="b")]),
+            )
+        
+        asyncio.run(run())
+        assert len(llm.calls) == 2
+
+
+class TestLRUCache:
+    """Test suite for the bounded LRU cache."""
+    
+    def test_returns_none_on_miss(self):
+        """Should return None for unknown keys."""
+        assert LRUCache(maxsize=2).get("missing") is None
+    
+    def test_evicts_least_recently_used(self):
+        """Should evict the entry that was used longest ago."""
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.put("b", 2)
+        cache.get("a")
+        cache.put("c", 3)
+        
+        assert cache.get("b") is None
+        assert cache.get("a") == 1
+        assert cache.get("c") == 3
+        assert len(cache) == 2
+    
+    @patch('src.agent.helpers.time.monotonic')
+    def test_entry_expires_after_ttl(self, mock_clock):
+        """Should stop serving an entry once its TTL has elapsed."""
+        cache = LRUCache(maxsize=2, ttl=10)
+        mock_clock.return_value = 100.0
+        cache.put("a", 1)
+        
+        mock_clock.return_value = 109.0
+        assert cache.get("a") == 1
+        
+        mock_clock.return_value = 110.0
+        assert cache.get("a") is None
+        assert len(cache) == 0
+    
+    def test_entry_without_ttl_does_not_expire(self):
+        """Should keep entries indefinitely when no TTL is set."""
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        with patch('src.agent.helpers.time.monotonic', return_value=1e12):
+            assert cache.get("a") == 1
+    
+    def test_discard_removes_entry(self):
+        """Should drop a key and ignore keys that are absent."""
+        cache = LRUCache(maxsize=2)
+        cache.put("a", 1)
+        cache.discard("a")
+        cache.discard("a")
+        assert cache.get("a") is None
+
+
+class TestSQLCacheKey:
+    """Test suite for SQL cache key construction."""
+    
+    def test_normalizes_whitespace(self):
+        """Should map phrasings that differ only in whitespace to one key."""
+        key1 = sql_cache_key("  Total  sales\nby region ", b"schema", False)
+        key2 = sql_cache_key("Total sales by region", b"schema", False)
+        assert key1 == key2
+    
+    def test_keeps_case(self):
+        """Should not share SQL between questions whose literals differ in case."""
+        assert sql_cache_key("Orders by Alice", b"schema", False) != sql_cache_key("orders by alice", b"schema", False)
+    
+    def test_schema_change_changes_key(self):
+        """Should not reuse SQL generated against a different schema."""
+        assert sql_cache_key("q", b"schema v1", False) != sql_cache_key("q", b"schema v2", False)
+    
+    def test_prompt_variant_changes_key(self):
+        """Should keep simple (Pyodide) and complex SQL apart."""
+        assert sql_cache_key("q", b"schema", True) != sql_cache_key("q", b"schema", False)
+
+
+class TestChartCacheKey:
+    """Test suite for chart cache key construction."""
+    
+    def test_identical_inputs_share_key(self):
+        """Should map the same decision over the same result to one key."""
+        key1 = chart_cache_key("Plot sales", "bar", "Sales", '[{"a": 1}]')
+        key2 = chart_cache_key("Plot sales", "bar", "Sales", '[{"a": 1}]')
+        assert key1 == key2
+    
+    def test_result_change_changes_key(self):
+        """Should not reuse a chart rendered from different data."""
+        key1 = chart_cache_key("Plot sales", "bar", "Sales", '[{"a": 1}]')
+        key2 = chart_cache_key("Plot sales", "bar", "Sales", '[{"a": 2}]')
+        assert key1 != key2
+    
+    def test_chart_decision_changes_key(self):
+        """Should keep different chart types and titles apart."""
+        base = chart_cache_key("Plot sales", "bar", "Sales", "[]")
+        assert chart_cache_key("Plot sales", "pie", "Sales", "[]") != base
+        assert chart_cache_key("Plot sales", "bar", None, "[]") != base
+
+
+class TestPyodideCodeCache:
+    """Test suite for the generated Pyodide code cache."""
+    
+    def test_is_bounded_and_expiring(self):
+        """Should use the configured size and the shared TTL."""
+        from src.agent.config import PYODIDE_CODE_CACHE_SIZE, CACHE_TTL_SECONDS
+        cache = get_pyodide_code_cache()
+        assert cache.maxsize == PYODIDE_CODE_CACHE_SIZE
+        assert cache.ttl == CACHE_TTL_SECONDS
+    
+    def test_returns_same_instance(self):
+        """Should share one cache across calls."""
+        assert get_pyodide_code_cache() is get_pyodide_code_cache()
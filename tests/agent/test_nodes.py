@@ -0,0 +1,118 @@
+"""
+Tests for workflow node behaviour.
+
+These tests validate that a SQL result cut at SQL_MAX_ROWS is flagged in
+the state and that the user-facing answer says so.
+"""
+
+import asyncio
+
+import pytest
+from langchain_core.messages import AIMessage
+from src.agent import nodes
+
+
+class _FakeStreamResult:
+    """Async streaming result that yields preset row partitions."""
+
+    def __init__(self, partitions):
+        self._partitions = partitions
+        self.fetched = 0
+
+    def mappings(self):
+        return self
+
+    async def partitions(self):
+        for partition in self._partitions:
+            self.fetched += 1
+            yield partition
+
+
+class _FakeConnection:
+    def __init__(self, result):
+        self._result = result
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, *exc_info):
+        return False
+
+    async def stream(self, statement, execution_options=None):
+        return self._result
+
+
+class _FakeEngine:
+    def __init__(self, result):
+        self._result = result
+
+    def connect(self):
+        return _FakeConnection(self._result)
+
+
+class _RecordingLLM:
+    """LLM stand-in that records its prompt and answers in the XML format."""
+
+    def __init__(self, content):
+        self.content = content
+        self.prompts = []
+
+    async def ainvoke(self, prompt):
+        self.prompts.append(prompt)
+        return AIMessage(content=self.content)
+
+
+class TestResultTruncation:
+    """Test suite for results capped at SQL_MAX_ROWS."""
+
+    @pytest.fixture
+    def run_sql(self, monkeypatch):
+        """Run _run_sql over fake partitions of two rows each, capped at 3 rows."""
+        monkeypatch.setattr(nodes, "SQL_MAX_ROWS", 3)
+        monkeypatch.setattr(nodes, "apply_pii_masking", lambda rows: rows)
+
+        def run(row_count):
+            rows = [{"id": i} for i in range(row_count)]
+            result = _FakeStreamResult([rows[i:i + 2] for i in range(0, row_count, 2)])
+            monkeypatch.setattr(nodes, "get_cached_engine", lambda: _FakeEngine(result))
+            update = asyncio.run(nodes._run_sql({"sql_query": "SELECT id FROM orders"}))
+            return update, result
+
+        return run
+
+    def test_result_past_cap_is_flagged(self, run_sql):
+        """Should keep the first SQL_MAX_ROWS rows, stop fetching and flag the cut."""
+        update, result = run_sql(10)
+        assert update["query_truncated"] is True
+        assert update["query_result"] == '[{"id":0},{"id":1},{"id":2}]'
+        assert result.fetched == 2
+
+    def test_result_within_cap_is_not_flagged(self, run_sql):
+        """Should not flag a result that fits under the cap."""
+        update, _ = run_sql(3)
+        assert update["query_truncated"] is False
+
+    def test_answer_and_prompt_mention_truncation(self, run_sql, monkeypatch):
+        """Should tell both the response LLM and the user that rows were cut."""
+        update, _ = run_sql(10)
+        llm = _RecordingLLM("<answer>There are 3 orders.</answer>")
+        monkeypatch.setattr(nodes, "get_llm_response", lambda: llm)
+
+        state = {"user_question": "How many orders are there?", **update}
+        answer = asyncio.run(nodes._draft_response(state))["messages"][-1].content
+
+        assert "first 3 are included" in llm.prompts[0]
+        assert answer.startswith("There are 3 orders.")
+        assert nodes._TRUNCATION_NOTE in answer
+
+    def test_complete_result_has_no_note(self, run_sql, monkeypatch):
+        """Should leave the answer and prompt unchanged for a complete result."""
+        update, _ = run_sql(3)
+        llm = _RecordingLLM("<answer>There are 3 orders.</answer>")
+        monkeypatch.setattr(nodes, "get_llm_response", lambda: llm)
+
+        state = {"user_question": "How many orders are there?", **update}
+        answer = asyncio.run(nodes._draft_response(state))["messages"][-1].content
+
+        assert "TRUNCATED RESULT" not in llm.prompts[0]
+        assert answer == "There are 3 orders."
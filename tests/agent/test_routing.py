@@ -141,3 +141,54 @@ class TestDecidePyodideRoute:
         """Should skip pyodide when needs_pyodide is None."""
         state = {"needs_pyodide": None}
         assert RouteDecider.decide_pyodide_route(state) == "skip"
+
+
+class TestDecidePostSQLRoute:
+    """Test suite for the fan-out after SQL execution."""
+    
+    def test_success_goes_to_visualise(self):
+        """Should run only the visualisation branch when no analysis is needed."""
+        state = {"query_result": '[{"count": 5}]', "needs_pyodide": False}
+        assert RouteDecider.decide_post_sql_route(state) == ["visualise"]
+    
+    def test_success_includes_pyodide_when_needed(self):
+        """Should add the Pyodide branch when analysis is required."""
+        state = {"query_result": '[{"count": 5}]', "needs_pyodide": True}
+        assert RouteDecider.decide_post_sql_route(state) == ["visualise", "pyodide"]
+    
+    def test_retry_is_not_fanned_out(self):
+        """Should pass the retry route through unchanged."""
+        state = {"query_result": "Error: syntax error", "sql_retry_count": 1}
+        assert RouteDecider.decide_post_sql_route(state) == "retry"
+    
+    def test_fallback_is_not_fanned_out(self):
+        """Should pass the fallback route through unchanged."""
+        state = {
+            "query_result": "Error: syntax error",
+            "sql_retry_count": 3,
+            "pyodide_fallback_attempted": False
+        }
+        assert RouteDecider.decide_post_sql_route(state, max_retries=3) == "fallback"
+
+
+class TestGotoTargets:
+    """Test suite for translating routes into Command.goto node names."""
+    
+    def test_sql_intent_goes_to_generate_sql(self):
+        """Should generate SQL for sql intent (Pyodide classification ran alongside)."""
+        assert RouteDecider.goto_after_intent({"intent": "sql"}) == "generate_SQL"
+    
+    def test_general_intent_goes_to_general_response(self):
+        """Should answer directly for general intent."""
+        assert RouteDecider.goto_after_intent({"intent": "general"}) == "generate_general_response"
+    
+    def test_success_branches_map_to_node_names(self):
+        """Should list the chart and Pyodide nodes on success (the response joins after)."""
+        assert RouteDecider.post_sql_targets(["visualise", "pyodide"]) == [
+            "visualisation_request_classification",
+            "generate_pyodide_analysis",
+        ]
+    
+    def test_retry_maps_to_generate_sql(self):
+        """Should regenerate SQL on retry."""
+        assert RouteDecider.post_sql_targets("retry") == "generate_SQL"
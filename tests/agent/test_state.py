@@ -0,0 +1,45 @@
+"""
+Tests for state helpers.
+
+These tests validate parsing of the fused intent/visualisation
+classifier output into an immutable Classification.
+"""
+
+import dataclasses
+import pytest
+from src.agent.state import Classification
+
+
+class TestClassification:
+    """Test suite for Classification parsing."""
+    
+    def test_parses_json_verdict(self):
+        """Should read intent and chart request from the JSON answer."""
+        result = Classification.from_llm_output('{"intent": "sql", "visualise": "yes"}')
+        assert result == Classification(intent="sql", needs_visualisation=True)
+    
+    def test_strips_markdown_fences(self):
+        """Should ignore ```json fences around the answer."""
+        result = Classification.from_llm_output('```json\n{"intent": "SQL", "visualise": "no"}\n```')
+        assert result == Classification(intent="sql", needs_visualisation=False)
+    
+    def test_legacy_single_word_answer(self):
+        """Should accept a bare intent word with an unknown chart verdict."""
+        result = Classification.from_llm_output("**sql**")
+        assert result == Classification(intent="sql", needs_visualisation=None)
+    
+    def test_invalid_intent_defaults_to_general(self):
+        """Should fall back to general (never visualised) for unknown intents."""
+        result = Classification.from_llm_output('{"intent": "maybe", "visualise": "yes"}')
+        assert result == Classification(intent="general", needs_visualisation=False)
+    
+    def test_to_state_update(self):
+        """Should produce one flat state update."""
+        result = Classification(intent="sql", needs_visualisation=None).to_state_update()
+        assert result == {"intent": "sql", "needs_visualisation": None}
+    
+    def test_is_immutable(self):
+        """Should reject mutation so cached instances can be shared."""
+        result = Classification(intent="sql", needs_visualisation=True)
+        with pytest.raises(dataclasses.FrozenInstanceError):
+            result.intent = "general"